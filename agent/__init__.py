@@ -1,10 +1,7 @@
 """
 AI-OS Agent Package
 """
-from agent.config import settings
-from agent.llm import llm_manager, Message, LLMResponse
-from agent.system_api import system_api, CommandResult
-from agent.plugins import plugin_manager, Plugin, PluginInfo
+import importlib
 
 __version__ = "0.1.0"
 __all__ = [
@@ -18,3 +15,31 @@ __all__ = [
     "Plugin",
     "PluginInfo",
 ]
+
+# Exports are imported on first access so that entry points which only need
+# a submodule (the shell, the CLI agent) don't construct the settings, LLM
+# manager and plugin manager at startup.
+_LAZY_EXPORTS = {
+    "settings": "agent.config",
+    "llm_manager": "agent.llm",
+    "Message": "agent.llm",
+    "LLMResponse": "agent.llm",
+    "system_api": "agent.system_api",
+    "CommandResult": "agent.system_api",
+    "plugin_manager": "agent.plugins",
+    "Plugin": "agent.plugins",
+    "PluginInfo": "agent.plugins",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
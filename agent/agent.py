@@ -2,6 +2,7 @@
 AI-OS Agent: Main event loop with command registry and system API.
 """
 import logging
+import sys
 from pathlib import Path
 from typing import Callable
 from agent.input.text_input import get_text_input
@@ -11,6 +12,8 @@ from agent.system_api import SystemAPI
 
 logger = logging.getLogger(__name__)
 
+_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
 
 def parse_command(raw: str) -> tuple[str, list[str]]:
     """Parse raw command string into command and args."""
@@ -31,16 +34,21 @@ class CommandRegistry:
             "time": (self._cmd_time, "Show system time"),
             "ls": (self._cmd_ls, "List files (usage: ls [path])"),
             "echo": (self._cmd_echo, "Echo a message (usage: echo <text>)"),
+            "clear": (self._cmd_clear, "Clear the screen"),
         }
+        # Audit signing key; loading it reads config.yaml and may hit the
+        # keyring, so it is done once on the first command
+        self._hmac_key: str | None = None
+        self._hmac_key_loaded = False
 
     def _cmd_exit(self, args: list[str]) -> bool:
         logger.info("Agent exit requested")
         return False
 
     def _cmd_help(self, args: list[str]) -> bool:
-        print("[AI-OS] Available commands:")
-        for name, (_, desc) in self.commands.items():
-            print(f"  {name:10} - {desc}")
+        lines = ["[AI-OS] Available commands:"]
+        lines.extend(f"  {name:10} - {desc}" for name, (_, desc) in self.commands.items())
+        print("\n".join(lines))
         return True
 
     def _cmd_time(self, args: list[str]) -> bool:
@@ -68,6 +76,12 @@ class CommandRegistry:
         print(f"[AI-OS] {self.api.echo(msg)}")
         return True
 
+    def _cmd_clear(self, args: list[str]) -> bool:
+        # Home and erase in one write, without print()'s trailing newline
+        sys.stdout.write(_CLEAR_SCREEN)
+        sys.stdout.flush()
+        return True
+
     def execute(self, cmd: str, args: list[str]) -> bool:
         """Execute a command. Return False to exit agent."""
         if not cmd:
@@ -75,18 +89,21 @@ class CommandRegistry:
         # log command for audit
         try:
             from agent.session import log_command_signed
-            from agent.config import load_config
 
-            cfg = load_config()
-            hmac_key = cfg.session_hmac_key
-            log_command_signed(cmd, args, hmac_key)
+            if not self._hmac_key_loaded:
+                from agent.config import load_config
+
+                self._hmac_key = load_config().session_hmac_key
+                self._hmac_key_loaded = True
+            log_command_signed(cmd, args, self._hmac_key)
         except Exception:
             logger.exception("Failed to write session log")
 
-        if cmd not in self.commands:
+        entry = self.commands.get(cmd)
+        if entry is None:
             print(f"[AI-OS] Unknown command: {cmd}. Type 'help' for available commands.")
             return True
-        handler, _ = self.commands[cmd]
+        handler, _ = entry
         try:
             return handler(args)
         except Exception as e:
@@ -2,14 +2,39 @@
 Text input handler for AI-OS agent.
 """
 import logging
+import sys
+import threading
+
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import InMemoryHistory
+    HAS_PROMPT_TOOLKIT = True
+except ImportError:
+    HAS_PROMPT_TOOLKIT = False
 
 logger = logging.getLogger(__name__)
 
+# One prompt session for the whole process, so line editing state and
+# history carry over between commands instead of being rebuilt each prompt
+_session = None
+
+
+def _read_line(prompt: str) -> str:
+    global _session
+    # prompt_toolkit needs a terminal and runs its own event loop, so worker
+    # threads (the async agent reads input from an executor) use input()
+    if (not HAS_PROMPT_TOOLKIT or not sys.stdin.isatty()
+            or threading.current_thread() is not threading.main_thread()):
+        return input(prompt)
+    if _session is None:
+        _session = PromptSession(history=InMemoryHistory())
+    return _session.prompt(prompt)
+
 
 def get_text_input(prompt: str = "[AI-OS] $ ") -> str:
     """Get text input from user with error handling."""
     try:
-        return input(prompt)
+        return _read_line(prompt)
     except EOFError:
         logger.info("EOF detected")
         return "exit"
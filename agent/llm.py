@@ -4,6 +4,8 @@ Provides a unified interface for different LLM providers (OpenAI, Anthropic, loc
 with integrated tool/function calling support.
 """
 import os
+import sys
+import time
 import logging
 from typing import Optional, Dict, Any, List, AsyncIterator, Union
 from dataclasses import dataclass, field
@@ -279,6 +281,8 @@ If a task requires multiple steps, you can call multiple tools in sequence."""
 
     MAX_CONVERSATION_HISTORY = 20
     MAX_TOOL_ITERATIONS = 10  # Prevent infinite tool loops
+    STREAM_FLUSH_CHARS = 64
+    STREAM_FLUSH_INTERVAL = 0.016  # seconds, about one frame
 
     def __init__(self, tool_executor=None):
         self._provider: Optional[LLMProvider] = None
@@ -353,12 +357,26 @@ If a task requires multiple steps, you can call multiple tools in sequence."""
         for iteration in range(self.MAX_TOOL_ITERATIONS):
             if stream and not tools:
                 # Streaming only for final response without tools
-                full_response = ""
+                # Tokens are written to the terminal in batches rather than
+                # one flushed write each
+                parts: List[str] = []
+                pending = 0
+                flushed = 0
+                last_flush = time.monotonic()
+                out = sys.stdout
                 async for chunk in self._provider.stream(self._conversation):
-                    print(chunk, end="", flush=True)
-                    full_response += chunk
-                print()
-                response_content = full_response
+                    parts.append(chunk)
+                    pending += len(chunk)
+                    now = time.monotonic()
+                    if pending >= self.STREAM_FLUSH_CHARS or now - last_flush >= self.STREAM_FLUSH_INTERVAL:
+                        out.write("".join(parts[flushed:]))
+                        out.flush()
+                        flushed = len(parts)
+                        pending = 0
+                        last_flush = now
+                out.write("".join(parts[flushed:]) + "\n")
+                out.flush()
+                response_content = "".join(parts)
                 self._conversation.append(Message(role="assistant", content=response_content))
                 return response_content
             
@@ -14,6 +14,16 @@ define AIOS_CORE_INSTALL_TARGET_CMDS
 	$(INSTALL) -D -m 0755 $(@D)/core/hal/aios-hal.py \
 		$(TARGET_DIR)/usr/lib/aios/hal/aios-hal.py
 	
+	# Install shared service modules (agent client, framed IPC, GTK helpers)
+	$(INSTALL) -D -m 0644 $(@D)/core/services/aios_common/__init__.py \
+		$(TARGET_DIR)/usr/lib/aios/services/aios_common/__init__.py
+	$(INSTALL) -D -m 0644 $(@D)/core/services/aios_common/framed_ipc.py \
+		$(TARGET_DIR)/usr/lib/aios/services/aios_common/framed_ipc.py
+	$(INSTALL) -D -m 0644 $(@D)/core/services/aios_common/agent_client.py \
+		$(TARGET_DIR)/usr/lib/aios/services/aios_common/agent_client.py
+	$(INSTALL) -D -m 0644 $(@D)/core/services/aios_common/gtk_ui.py \
+		$(TARGET_DIR)/usr/lib/aios/services/aios_common/gtk_ui.py
+	
 	# Install CLI
 	$(INSTALL) -D -m 0755 $(@D)/core/cli/aios \
 		$(TARGET_DIR)/usr/bin/aios
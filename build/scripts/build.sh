@@ -143,6 +143,7 @@ install_aios_components() {
     mkdir -p "$STAGING/usr/lib/aios/services/power"
     mkdir -p "$STAGING/usr/lib/aios/services/notify"
     mkdir -p "$STAGING/usr/lib/aios/services/network"
+    mkdir -p "$STAGING/usr/lib/aios/services/aios_common"
     mkdir -p "$STAGING/usr/lib/aios/ui"
     mkdir -p "$STAGING/usr/lib/aios/apps"
     mkdir -p "$STAGING/usr/lib/aios/plugins"
@@ -162,9 +163,14 @@ install_aios_components() {
     cp "$PROJECT_ROOT/core/services/aios-power/power.py" "$STAGING/usr/lib/aios/services/power/"
     cp "$PROJECT_ROOT/core/services/aios-notify/notify.py" "$STAGING/usr/lib/aios/services/notify/"
     cp "$PROJECT_ROOT/core/services/aios-network/network.py" "$STAGING/usr/lib/aios/services/network/"
+    cp "$PROJECT_ROOT/core/services/aios_common/__init__.py" "$STAGING/usr/lib/aios/services/aios_common/"
+    cp "$PROJECT_ROOT/core/services/aios_common/framed_ipc.py" "$STAGING/usr/lib/aios/services/aios_common/"
+    cp "$PROJECT_ROOT/core/services/aios_common/agent_client.py" "$STAGING/usr/lib/aios/services/aios_common/"
+    cp "$PROJECT_ROOT/core/services/aios_common/gtk_ui.py" "$STAGING/usr/lib/aios/services/aios_common/"
     
     # Copy UI
     cp "$PROJECT_ROOT/core/ui/shell.py" "$STAGING/usr/lib/aios/ui/"
+    cp "$PROJECT_ROOT/core/ui/theme.py" "$STAGING/usr/lib/aios/ui/"
     
     # Copy other modules
     cp "$PROJECT_ROOT/core/apps/framework.py" "$STAGING/usr/lib/aios/apps/"
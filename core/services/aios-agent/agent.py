@@ -35,6 +35,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger('aios-agent')
 
+# Shared service modules live one directory up (core/services/aios_common)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aios_common.framed_ipc import HAS_MSGPACK
+
+if HAS_MSGPACK:
+    from aios_common.framed_ipc import _msgpack_decode, _msgpack_encode
+
 
 # ==============================================================================
 # Configuration
@@ -725,28 +732,38 @@ class AgentDaemon:
             os.unlink(self.config.socket_path)
     
     async def _handle_client(self, reader, writer):
-        """Handle IPC client connection"""
+        """Handle IPC client connection.
+        
+        Frames are a 4-byte big-endian length followed by a JSON or
+        MessagePack payload. The socket stays SOCK_STREAM: asyncio has no
+        SOCK_SEQPACKET server, and the voice, input and UI clients all
+        share this framing.
+        """
         try:
             while True:
-                # Read message length
-                length_data = await reader.read(4)
-                if not length_data:
-                    break
-                
-                length = struct.unpack('!I', length_data)[0]
-                
-                # Read message
-                data = await reader.read(length)
-                if not data:
+                try:
+                    length_data = await reader.readexactly(4)
+                    length = struct.unpack('!I', length_data)[0]
+                    data = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
                     break
                 
-                request = json.loads(data.decode('utf-8'))
+                # JSON requests always open with '{'; anything else is
+                # MessagePack, and the reply uses the same encoding
+                msgpack = HAS_MSGPACK and data[:1] != b'{'
+                if msgpack:
+                    request = _msgpack_decode(data)
+                else:
+                    request = json.loads(data.decode('utf-8'))
                 response = await self._process_request(request)
                 
                 # Send response
-                response_data = json.dumps(response).encode('utf-8')
-                writer.write(struct.pack('!I', len(response_data)))
-                writer.write(response_data)
+                if msgpack:
+                    response_data = _msgpack_encode(response)
+                else:
+                    response_data = json.dumps(response).encode('utf-8')
+                # Header and payload in one write so the frame goes out in one send
+                writer.write(struct.pack('!I', len(response_data)) + response_data)
                 await writer.drain()
                 
         except Exception as e:
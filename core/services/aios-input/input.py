@@ -11,9 +11,8 @@ import logging
 import asyncio
 import json
 import struct
-import socket
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass
 from enum import Enum, auto
 
@@ -23,6 +22,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger('aios-input')
 
+AGENT_SOCKET = '/run/aios/agent.sock'
+
+# Length prefix used by the agent IPC framing
+_LEN_HDR = struct.Struct('!I')
+
+# struct input_event: timeval + type + code + value
+_EVENT_STRUCT = struct.Struct('qqHHi')
+_EVENT_BATCH = 64
+
 
 class KeyCode(Enum):
     """Common key codes"""
@@ -68,10 +76,31 @@ class KeyCode(Enum):
     LEFTMETA = 125  # Super/Windows key
 
 
-@dataclass
+# Plain int key codes for the per-keystroke path; KeyCode stays the reference
+LEFTCTRL = KeyCode.LEFTCTRL.value
+LEFTALT = KeyCode.LEFTALT.value
+LEFTSHIFT = KeyCode.LEFTSHIFT.value
+LEFTMETA = KeyCode.LEFTMETA.value
+
+_KEY_NAME_TO_CODE = {
+    'space': KeyCode.SPACE.value,
+    'a': KeyCode.A.value,
+    't': KeyCode.T.value,
+    'l': 38,  # L key
+    'q': KeyCode.Q.value,
+    'escape': KeyCode.ESCAPE.value,
+    'f1': KeyCode.F1.value,
+    'f2': KeyCode.F2.value,
+    'f3': KeyCode.F3.value,
+    'f4': KeyCode.F4.value,
+    'tab': KeyCode.TAB.value,
+}
+
+
+@dataclass(slots=True, frozen=True)
 class Hotkey:
     """Hotkey definition"""
-    modifiers: List[str]  # ctrl, alt, shift, super
+    modifiers: Tuple[str, ...]  # ctrl, alt, shift, super
     key: str
     action: str
     description: str
@@ -80,68 +109,80 @@ class Hotkey:
 class InputService:
     """Main input handling service"""
     
-    DEFAULT_HOTKEYS = [
-        Hotkey(['super'], 'space', 'agent_activate', 'Activate AI Agent'),
-        Hotkey(['super'], 'a', 'app_launcher', 'Open App Launcher'),
-        Hotkey(['super'], 't', 'terminal', 'Open Terminal'),
-        Hotkey(['super'], 'l', 'lock', 'Lock Screen'),
-        Hotkey(['super'], 'q', 'close_window', 'Close Current Window'),
-        Hotkey(['ctrl', 'alt'], 't', 'terminal', 'Open Terminal'),
-        Hotkey(['ctrl', 'alt'], 'delete', 'system_menu', 'System Menu'),
-        Hotkey(['alt'], 'f4', 'close_window', 'Close Window'),
-        Hotkey(['alt'], 'tab', 'switch_window', 'Switch Windows'),
-        Hotkey([], 'Print', 'screenshot', 'Take Screenshot'),
+    DEFAULT_HOTKEYS = (
+        Hotkey(('super',), 'space', 'agent_activate', 'Activate AI Agent'),
+        Hotkey(('super',), 'a', 'app_launcher', 'Open App Launcher'),
+        Hotkey(('super',), 't', 'terminal', 'Open Terminal'),
+        Hotkey(('super',), 'l', 'lock', 'Lock Screen'),
+        Hotkey(('super',), 'q', 'close_window', 'Close Current Window'),
+        Hotkey(('ctrl', 'alt'), 't', 'terminal', 'Open Terminal'),
+        Hotkey(('ctrl', 'alt'), 'delete', 'system_menu', 'System Menu'),
+        Hotkey(('alt',), 'f4', 'close_window', 'Close Window'),
+        Hotkey(('alt',), 'tab', 'switch_window', 'Switch Windows'),
+        Hotkey((), 'Print', 'screenshot', 'Take Screenshot'),
         # Volume keys
-        Hotkey([], 'XF86AudioRaiseVolume', 'volume_up', 'Volume Up'),
-        Hotkey([], 'XF86AudioLowerVolume', 'volume_down', 'Volume Down'),
-        Hotkey([], 'XF86AudioMute', 'volume_mute', 'Mute'),
+        Hotkey((), 'XF86AudioRaiseVolume', 'volume_up', 'Volume Up'),
+        Hotkey((), 'XF86AudioLowerVolume', 'volume_down', 'Volume Down'),
+        Hotkey((), 'XF86AudioMute', 'volume_mute', 'Mute'),
         # Brightness keys
-        Hotkey([], 'XF86MonBrightnessUp', 'brightness_up', 'Brightness Up'),
-        Hotkey([], 'XF86MonBrightnessDown', 'brightness_down', 'Brightness Down'),
-    ]
+        Hotkey((), 'XF86MonBrightnessUp', 'brightness_up', 'Brightness Up'),
+        Hotkey((), 'XF86MonBrightnessDown', 'brightness_down', 'Brightness Down'),
+    )
     
     def __init__(self):
-        self.hotkeys = self.DEFAULT_HOTKEYS.copy()
         self.running = False
         self._input_devices: List[str] = []
         self._pressed_keys: set = set()
+        self._agent_writer: Optional[asyncio.StreamWriter] = None
+        self._agent_drain: Optional[asyncio.Task] = None
         
-        # Load custom hotkeys
-        self._load_config()
+        # Backlight device is resolved once; its max never changes
+        self._bl_fd: Optional[int] = None
+        self._max_brightness = 0
+        self._open_backlight()
+        
+        # Defaults plus custom hotkeys
+        self.hotkeys = list(self.DEFAULT_HOTKEYS) + self._load_config()
     
-    def _load_config(self):
+    def _load_config(self) -> List[Hotkey]:
         """Load hotkey configuration"""
+        hotkeys = []
         config_path = Path('/etc/aios/input.json')
         if config_path.exists():
             try:
                 with open(config_path) as f:
                     data = json.load(f)
                 for hk in data.get('hotkeys', []):
-                    self.hotkeys.append(Hotkey(
-                        modifiers=hk.get('modifiers', []),
+                    hotkeys.append(Hotkey(
+                        modifiers=tuple(hk.get('modifiers', ())),
                         key=hk['key'],
                         action=hk['action'],
                         description=hk.get('description', '')
                     ))
             except Exception as e:
                 logger.warning(f"Failed to load config: {e}")
+        return hotkeys
     
     def _discover_devices(self) -> List[str]:
         """Discover input devices"""
         devices = []
-        input_path = Path('/dev/input')
         
-        for event in input_path.glob('event*'):
-            # Check if it's a keyboard
-            try:
-                sysfs = Path(f'/sys/class/input/{event.name}/device/capabilities/key')
-                if sysfs.exists():
-                    caps = sysfs.read_text().strip()
-                    # Has keyboard keys
-                    if caps and int(caps.replace(' ', ''), 16) > 0:
-                        devices.append(str(event))
-            except:
-                pass
+        try:
+            with os.scandir('/dev/input') as it:
+                for entry in it:
+                    if not entry.name.startswith('event'):
+                        continue
+                    # Check if it's a keyboard
+                    try:
+                        with open(f'/sys/class/input/{entry.name}/device/capabilities/key', 'rb') as f:
+                            caps = f.read().strip()
+                        # Has keyboard keys
+                        if caps and int(caps.replace(b' ', b''), 16) > 0:
+                            devices.append(entry.path)
+                    except (OSError, ValueError):
+                        pass
+        except OSError as e:
+            logger.warning(f"Failed to scan input devices: {e}")
         
         return devices
     
@@ -168,14 +209,17 @@ class InputService:
             # Open device
             fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK)
             
+            # Reused for every read so bursts don't allocate
+            event_size = _EVENT_STRUCT.size
+            buf = bytearray(event_size * _EVENT_BATCH)
+            mv = memoryview(buf)
+            
             while self.running:
                 try:
-                    # Read input event (24 bytes: timeval + type + code + value)
-                    data = os.read(fd, 24)
-                    if len(data) == 24:
-                        # Parse event
-                        tv_sec, tv_usec, ev_type, code, value = struct.unpack('qqHHi', data)
-                        
+                    # Read as many whole input events as are queued
+                    n = os.readv(fd, [buf])
+                    n -= n % event_size
+                    for tv_sec, tv_usec, ev_type, code, value in _EVENT_STRUCT.iter_unpack(mv[:n]):
                         # Key event (type 1)
                         if ev_type == 1:
                             if value == 1:  # Key press
@@ -201,10 +245,11 @@ class InputService:
     async def _check_hotkey(self, key_code: int):
         """Check if current key state matches a hotkey"""
         # Check modifiers
-        ctrl = KeyCode.LEFTCTRL.value in self._pressed_keys
-        alt = KeyCode.LEFTALT.value in self._pressed_keys
-        shift = KeyCode.LEFTSHIFT.value in self._pressed_keys
-        super_key = KeyCode.LEFTMETA.value in self._pressed_keys
+        pressed = self._pressed_keys
+        ctrl = LEFTCTRL in pressed
+        alt = LEFTALT in pressed
+        shift = LEFTSHIFT in pressed
+        super_key = LEFTMETA in pressed
         
         for hotkey in self.hotkeys:
             # Check modifiers match
@@ -227,20 +272,7 @@ class InputService:
     
     def _key_matches(self, key_name: str, code: int) -> bool:
         """Check if key name matches code"""
-        key_map = {
-            'space': KeyCode.SPACE.value,
-            'a': KeyCode.A.value,
-            't': KeyCode.T.value,
-            'l': 38,  # L key
-            'q': KeyCode.Q.value,
-            'escape': KeyCode.ESCAPE.value,
-            'f1': KeyCode.F1.value,
-            'f2': KeyCode.F2.value,
-            'f3': KeyCode.F3.value,
-            'f4': KeyCode.F4.value,
-            'tab': KeyCode.TAB.value,
-        }
-        return key_map.get(key_name.lower()) == code
+        return _KEY_NAME_TO_CODE.get(key_name.lower()) == code
     
     async def _execute_action(self, action: str):
         """Execute hotkey action"""
@@ -284,34 +316,84 @@ class InputService:
             logger.error(f"Action error: {e}")
     
     async def _send_to_agent(self, message: str):
-        """Send message to agent daemon"""
+        """Send message to agent daemon over a persistent connection"""
         try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            sock.connect('/run/aios/agent.sock')
+            if self._agent_writer is None or self._agent_writer.is_closing():
+                reader, self._agent_writer = await asyncio.open_unix_connection(AGENT_SOCKET)
+                self._agent_drain = asyncio.create_task(
+                    self._drain_agent(reader, self._agent_writer)
+                )
             data = message.encode()
-            sock.send(struct.pack('!I', len(data)) + data)
-            sock.close()
-        except:
-            pass
+            self._agent_writer.write(_LEN_HDR.pack(len(data)) + data)
+            await self._agent_writer.drain()
+        except Exception as e:
+            logger.debug(f"Agent send failed: {e}")
+            self._close_agent()
+    
+    async def _drain_agent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read and discard the agent's reply frames
+        
+        Replies are not needed here, but left unread they fill the socket
+        until both sides block in drain().
+        """
+        try:
+            while True:
+                length, = _LEN_HDR.unpack(await reader.readexactly(_LEN_HDR.size))
+                await reader.readexactly(length)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Agent connection closed: {e}")
+            # A newer connection may already have replaced this one
+            if self._agent_writer is writer:
+                self._agent_drain = None
+                self._close_agent()
+    
+    def _close_agent(self):
+        """Drop the agent connection so the next send reconnects"""
+        if self._agent_drain is not None:
+            self._agent_drain.cancel()
+            self._agent_drain = None
+        if self._agent_writer is not None:
+            try:
+                self._agent_writer.close()
+            except Exception:
+                pass
+            self._agent_writer = None
+    
+    def _open_backlight(self):
+        """Open the first backlight device for repeated brightness updates"""
+        try:
+            device = next(Path('/sys/class/backlight').iterdir(), None)
+            if device is None:
+                return
+            self._max_brightness = int((device / 'max_brightness').read_text().strip())
+            self._bl_fd = os.open(str(device / 'brightness'), os.O_RDWR)
+        except Exception as e:
+            logger.debug(f"No usable backlight: {e}")
     
     async def _adjust_brightness(self, delta: int):
         """Adjust screen brightness"""
+        if self._bl_fd is None:
+            return
         try:
-            for device in Path('/sys/class/backlight').iterdir():
-                current = int((device / 'brightness').read_text().strip())
-                max_val = int((device / 'max_brightness').read_text().strip())
-                
-                new_val = current + (max_val * delta // 100)
-                new_val = max(0, min(max_val, new_val))
-                
-                (device / 'brightness').write_text(str(new_val))
-                break
+            current = int(os.pread(self._bl_fd, 16, 0))
+            max_val = self._max_brightness
+            
+            new_val = current + (max_val * delta // 100)
+            new_val = max(0, min(max_val, new_val))
+            
+            os.pwrite(self._bl_fd, str(new_val).encode(), 0)
         except Exception as e:
             logger.error(f"Brightness error: {e}")
     
     def stop(self):
         """Stop service"""
         self.running = False
+        self._close_agent()
+        if self._bl_fd is not None:
+            os.close(self._bl_fd)
+            self._bl_fd = None
 
 
 def main():
@@ -5,15 +5,31 @@ Handles WiFi, Ethernet, Bluetooth, and VPN configuration.
 """
 
 import os
+import shutil
 import subprocess
+import asyncio
+import time
 import json
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
-from pathlib import Path
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 import logging
 
 logger = logging.getLogger('aios-network')
 
+SYSFS_NET = '/sys/class/net'
+
+# Interface name prefixes classified as wired ethernet
+_ETHERNET_PREFIXES = ('eth', 'en')
+
+
+def _read_tiny(path: str) -> bytes:
+    """Read a short sysfs attribute in a single read call"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 64).rstrip()
+    finally:
+        os.close(fd)
+
 
 @dataclass
 class NetworkInterface:
@@ -50,28 +66,82 @@ class BluetoothDevice:
 class NetworkManager:
     """AI-OS Network Manager"""
     
+    # How long a query result is shared between back-to-back callers
+    CACHE_TTL = 0.5
+    
     def __init__(self):
+        self._cache: Dict[Tuple[str, ...], Tuple[float, str]] = {}
         self._check_tools()
     
     def _check_tools(self):
         """Check for required tools"""
-        self.has_nmcli = self._cmd_exists('nmcli')
+        # Resolve absolute paths once so later calls skip PATH lookup
+        self._nmcli_path = shutil.which('nmcli')
+        self._bluetoothctl_path = shutil.which('bluetoothctl')
+        self.has_nmcli = self._nmcli_path is not None
         self.has_iw = self._cmd_exists('iw')
-        self.has_bluetoothctl = self._cmd_exists('bluetoothctl')
+        self.has_bluetoothctl = self._bluetoothctl_path is not None
+        self._bt_scan_timeout = self.has_bluetoothctl and self._supports_timeout()
+    
+    def _supports_timeout(self) -> bool:
+        """Check whether bluetoothctl accepts --timeout (BlueZ 5.50+)"""
+        try:
+            result = subprocess.run([self._bluetoothctl_path, '--help'],
+                                    capture_output=True, text=True, timeout=2)
+            return '--timeout' in result.stdout
+        except Exception:
+            return False
     
     def _cmd_exists(self, cmd: str) -> bool:
         """Check if a command exists"""
-        return subprocess.run(['which', cmd], capture_output=True).returncode == 0
-    
-    def _run(self, cmd: List[str], timeout: int = 10) -> Optional[str]:
-        """Run a command and return output"""
+        return shutil.which(cmd) is not None
+    
+    def invalidate(self):
+        """Drop cached command output after state changes"""
+        self._cache.clear()
+    
+    async def _run(self, cmd: List[str], timeout: int = 10) -> Optional[str]:
+        """Run a command and return output, reusing results within CACHE_TTL"""
+        key = tuple(cmd)
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit and now - hit[0] < self.CACHE_TTL:
+            return hit[1]
+        
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-            return result.stdout
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise
+            output = out.decode()
+            self._cache[key] = (now, output)
+            return output
         except Exception as e:
             logger.error(f"Command failed: {' '.join(cmd)}: {e}")
             return None
     
+    async def _exec(self, cmd: List[str], timeout: Optional[int] = None) -> bool:
+        """Run a state-changing command and report whether it succeeded"""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+            )
+            return await asyncio.wait_for(proc.wait(), timeout) == 0
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return False
+        except Exception as e:
+            logger.error(f"Command failed: {' '.join(cmd)}: {e}")
+            return False
+        finally:
+            self.invalidate()
+    
     # ==================== General ====================
     
     def get_interfaces(self) -> List[NetworkInterface]:
@@ -79,44 +149,44 @@ class NetworkManager:
         interfaces = []
         
         try:
-            for iface in Path('/sys/class/net').iterdir():
-                name = iface.name
-                
-                # Get type
-                if (iface / 'wireless').exists():
-                    itype = 'wifi'
-                elif name.startswith('eth') or name.startswith('en'):
-                    itype = 'ethernet'
-                elif name == 'lo':
-                    itype = 'loopback'
-                else:
-                    itype = 'unknown'
-                
-                # Get state
-                state = (iface / 'operstate').read_text().strip()
-                
-                # Get MAC
-                mac = (iface / 'address').read_text().strip()
-                
-                interfaces.append(NetworkInterface(
-                    name=name,
-                    type=itype,
-                    state=state,
-                    mac_address=mac
-                ))
+            with os.scandir(SYSFS_NET) as it:
+                for entry in it:
+                    name = entry.name
+                    path = entry.path
+                    
+                    # Get type
+                    if os.path.exists(f'{path}/wireless'):
+                        itype = 'wifi'
+                    elif name.startswith(_ETHERNET_PREFIXES):
+                        itype = 'ethernet'
+                    elif name == 'lo':
+                        itype = 'loopback'
+                    else:
+                        itype = 'unknown'
+                    
+                    # Get state and MAC
+                    state = _read_tiny(f'{path}/operstate')
+                    mac = _read_tiny(f'{path}/address')
+                    
+                    interfaces.append(NetworkInterface(
+                        name=name,
+                        type=itype,
+                        state=state.decode(),
+                        mac_address=mac.decode()
+                    ))
         except Exception as e:
             logger.error(f"Failed to get interfaces: {e}")
         
         return interfaces
     
-    def get_connection_status(self) -> Dict[str, Any]:
+    async def get_connection_status(self) -> Dict[str, Any]:
         """Get overall connection status"""
         if self.has_nmcli:
-            output = self._run(['nmcli', '-t', '-f', 'TYPE,STATE,CONNECTION', 'device'])
+            output = await self._run([self._nmcli_path, '-t', '-f', 'TYPE,STATE,CONNECTION', 'device'])
             if output:
-                for line in output.strip().split('\n'):
-                    parts = line.split(':')
-                    if len(parts) >= 3 and parts[1] == 'connected':
+                for line in output.splitlines():
+                    parts = line.split(':', 2)
+                    if len(parts) == 3 and parts[1] == 'connected':
                         return {
                             'connected': True,
                             'type': parts[0],
@@ -127,105 +197,123 @@ class NetworkManager:
     
     # ==================== WiFi ====================
     
-    def scan_wifi(self) -> List[WifiNetwork]:
-        """Scan for WiFi networks"""
-        networks = []
+    async def scan_wifi(self) -> AsyncIterator[WifiNetwork]:
+        """Scan for WiFi networks, yielding each one as nmcli reports it"""
+        if not self.has_nmcli:
+            return
         
-        if self.has_nmcli:
-            # Trigger rescan
-            self._run(['nmcli', 'device', 'wifi', 'rescan'])
-            
-            output = self._run(['nmcli', '-t', '-f', 'ACTIVE,SSID,SIGNAL,SECURITY', 'device', 'wifi', 'list'])
-            if output:
-                for line in output.strip().split('\n'):
-                    parts = line.split(':')
-                    if len(parts) >= 4 and parts[1]:  # Has SSID
-                        networks.append(WifiNetwork(
-                            ssid=parts[1],
-                            signal=int(parts[2]) if parts[2].isdigit() else 0,
-                            security=parts[3],
-                            connected=parts[0] == 'yes'
-                        ))
+        cmd = [self._nmcli_path, '-t', '-f', 'ACTIVE,SSID,SIGNAL,SECURITY',
+               'device', 'wifi', 'list', '--rescan', 'yes']
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except Exception as e:
+            logger.error(f"Command failed: {' '.join(cmd)}: {e}")
+            return
         
-        return networks
-    
-    def connect_wifi(self, ssid: str, password: Optional[str] = None) -> bool:
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                parts = line.rstrip(b'\n').split(b':', 3)
+                if len(parts) == 4 and parts[1]:  # Has SSID
+                    yield WifiNetwork(
+                        ssid=parts[1].decode(errors='replace'),
+                        signal=int(parts[2]) if parts[2].isdigit() else 0,
+                        security=parts[3].decode(),
+                        connected=parts[0] == b'yes'
+                    )
+        finally:
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+            await proc.wait()
+    
+    async def connect_wifi(self, ssid: str, password: Optional[str] = None) -> bool:
         """Connect to a WiFi network"""
         if not self.has_nmcli:
             return False
         
-        cmd = ['nmcli', 'device', 'wifi', 'connect', ssid]
+        cmd = [self._nmcli_path, 'device', 'wifi', 'connect', ssid]
         if password:
             cmd.extend(['password', password])
         
-        result = subprocess.run(cmd, capture_output=True)
-        return result.returncode == 0
+        return await self._exec(cmd)
     
-    def disconnect_wifi(self) -> bool:
+    async def disconnect_wifi(self) -> bool:
         """Disconnect from current WiFi"""
         if not self.has_nmcli:
             return False
         
-        result = subprocess.run(['nmcli', 'device', 'disconnect', 'wlan0'], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._nmcli_path, 'device', 'disconnect', 'wlan0'])
     
-    def wifi_enabled(self) -> bool:
+    async def wifi_enabled(self) -> bool:
         """Check if WiFi is enabled"""
         if self.has_nmcli:
-            output = self._run(['nmcli', 'radio', 'wifi'])
+            output = await self._run([self._nmcli_path, 'radio', 'wifi'])
             return output and 'enabled' in output.lower()
         return False
     
-    def set_wifi_enabled(self, enabled: bool) -> bool:
+    async def set_wifi_enabled(self, enabled: bool) -> bool:
         """Enable/disable WiFi"""
         if not self.has_nmcli:
             return False
         
         state = 'on' if enabled else 'off'
-        result = subprocess.run(['nmcli', 'radio', 'wifi', state], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._nmcli_path, 'radio', 'wifi', state])
+    
+    async def _list_connections(self) -> List[Tuple[str, str]]:
+        """List saved connections as (name, type) pairs"""
+        output = await self._run([self._nmcli_path, '-t', '-f', 'NAME,TYPE', 'connection'])
+        if not output:
+            return []
+        return [
+            (name, ctype)
+            for name, sep, ctype in (line.rpartition(':') for line in output.splitlines())
+            if sep
+        ]
     
-    def get_saved_networks(self) -> List[str]:
+    async def get_saved_networks(self) -> List[str]:
         """Get list of saved WiFi networks"""
         if not self.has_nmcli:
             return []
         
-        output = self._run(['nmcli', '-t', '-f', 'NAME,TYPE', 'connection'])
-        if output:
-            return [
-                line.split(':')[0]
-                for line in output.strip().split('\n')
-                if ':802-11-wireless' in line
-            ]
-        return []
-    
-    def forget_network(self, name: str) -> bool:
+        return [name for name, ctype in await self._list_connections() if ctype == '802-11-wireless']
+    
+    async def forget_network(self, name: str) -> bool:
         """Forget a saved network"""
         if not self.has_nmcli:
             return False
         
-        result = subprocess.run(['nmcli', 'connection', 'delete', name], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._nmcli_path, 'connection', 'delete', name])
     
     # ==================== Bluetooth ====================
     
-    def scan_bluetooth(self, duration: int = 5) -> List[BluetoothDevice]:
+    async def scan_bluetooth(self, duration: int = 5) -> List[BluetoothDevice]:
         """Scan for Bluetooth devices"""
         devices = []
         
         if not self.has_bluetoothctl:
             return devices
         
-        # Start scan
-        subprocess.run(['bluetoothctl', 'scan', 'on'], capture_output=True, timeout=2)
-        import time
-        time.sleep(duration)
-        subprocess.run(['bluetoothctl', 'scan', 'off'], capture_output=True, timeout=2)
+        # Scan; other queries keep running while we wait
+        if self._bt_scan_timeout:
+            # bluetoothctl stops the scan itself once the timeout expires
+            await self._exec([self._bluetoothctl_path, '--timeout', str(duration), 'scan', 'on'],
+                             timeout=duration + 2)
+        else:
+            await self._exec([self._bluetoothctl_path, 'scan', 'on'], timeout=2)
+            await asyncio.sleep(duration)
+            await self._exec([self._bluetoothctl_path, 'scan', 'off'], timeout=2)
         
         # Get devices
-        output = self._run(['bluetoothctl', 'devices'])
+        output = await self._run([self._bluetoothctl_path, 'devices'])
         if output:
-            for line in output.strip().split('\n'):
+            for line in output.splitlines():
                 if line.startswith('Device'):
                     parts = line.split(' ', 2)
                     if len(parts) >= 3:
@@ -238,16 +326,16 @@ class NetworkManager:
         
         return devices
     
-    def get_paired_devices(self) -> List[BluetoothDevice]:
+    async def get_paired_devices(self) -> List[BluetoothDevice]:
         """Get paired Bluetooth devices"""
         devices = []
         
         if not self.has_bluetoothctl:
             return devices
         
-        output = self._run(['bluetoothctl', 'paired-devices'])
+        output = await self._run([self._bluetoothctl_path, 'paired-devices'])
         if output:
-            for line in output.strip().split('\n'):
+            for line in output.splitlines():
                 if line.startswith('Device'):
                     parts = line.split(' ', 2)
                     if len(parts) >= 3:
@@ -260,120 +348,119 @@ class NetworkManager:
         
         return devices
     
-    def connect_bluetooth(self, address: str) -> bool:
+    async def connect_bluetooth(self, address: str) -> bool:
         """Connect to a Bluetooth device"""
         if not self.has_bluetoothctl:
             return False
         
-        result = subprocess.run(['bluetoothctl', 'connect', address], capture_output=True, timeout=10)
-        return result.returncode == 0
+        return await self._exec([self._bluetoothctl_path, 'connect', address], timeout=10)
     
-    def disconnect_bluetooth(self, address: str) -> bool:
+    async def disconnect_bluetooth(self, address: str) -> bool:
         """Disconnect from a Bluetooth device"""
         if not self.has_bluetoothctl:
             return False
         
-        result = subprocess.run(['bluetoothctl', 'disconnect', address], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._bluetoothctl_path, 'disconnect', address])
     
-    def pair_bluetooth(self, address: str) -> bool:
+    async def pair_bluetooth(self, address: str) -> bool:
         """Pair with a Bluetooth device"""
         if not self.has_bluetoothctl:
             return False
         
         # Trust first
-        subprocess.run(['bluetoothctl', 'trust', address], capture_output=True)
+        await self._exec([self._bluetoothctl_path, 'trust', address])
         
-        result = subprocess.run(['bluetoothctl', 'pair', address], capture_output=True, timeout=30)
-        return result.returncode == 0
+        return await self._exec([self._bluetoothctl_path, 'pair', address], timeout=30)
     
-    def bluetooth_enabled(self) -> bool:
+    async def bluetooth_enabled(self) -> bool:
         """Check if Bluetooth is enabled"""
         if not self.has_bluetoothctl:
             return False
         
-        output = self._run(['bluetoothctl', 'show'])
+        output = await self._run([self._bluetoothctl_path, 'show'])
         return output and 'Powered: yes' in output
     
-    def set_bluetooth_enabled(self, enabled: bool) -> bool:
+    async def set_bluetooth_enabled(self, enabled: bool) -> bool:
         """Enable/disable Bluetooth"""
         if not self.has_bluetoothctl:
             return False
         
         state = 'on' if enabled else 'off'
-        result = subprocess.run(['bluetoothctl', 'power', state], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._bluetoothctl_path, 'power', state])
     
     # ==================== VPN ====================
     
-    def get_vpn_connections(self) -> List[str]:
+    async def get_vpn_connections(self) -> List[str]:
         """Get available VPN connections"""
         if not self.has_nmcli:
             return []
         
-        output = self._run(['nmcli', '-t', '-f', 'NAME,TYPE', 'connection'])
-        if output:
-            return [
-                line.split(':')[0]
-                for line in output.strip().split('\n')
-                if ':vpn' in line
-            ]
-        return []
-    
-    def connect_vpn(self, name: str) -> bool:
+        return [name for name, ctype in await self._list_connections() if ctype == 'vpn']
+    
+    async def connect_vpn(self, name: str) -> bool:
         """Connect to a VPN"""
         if not self.has_nmcli:
             return False
         
-        result = subprocess.run(['nmcli', 'connection', 'up', name], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._nmcli_path, 'connection', 'up', name])
     
-    def disconnect_vpn(self, name: str) -> bool:
+    async def disconnect_vpn(self, name: str) -> bool:
         """Disconnect from a VPN"""
         if not self.has_nmcli:
             return False
         
-        result = subprocess.run(['nmcli', 'connection', 'down', name], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._nmcli_path, 'connection', 'down', name])
     
     # ==================== Hotspot ====================
     
-    def create_hotspot(self, ssid: str, password: str) -> bool:
+    async def create_hotspot(self, ssid: str, password: str) -> bool:
         """Create a WiFi hotspot"""
         if not self.has_nmcli:
             return False
         
-        result = subprocess.run([
-            'nmcli', 'device', 'wifi', 'hotspot',
+        return await self._exec([
+            self._nmcli_path, 'device', 'wifi', 'hotspot',
             'ssid', ssid,
             'password', password
-        ], capture_output=True)
-        return result.returncode == 0
+        ])
     
-    def stop_hotspot(self) -> bool:
+    async def stop_hotspot(self) -> bool:
         """Stop the WiFi hotspot"""
         if not self.has_nmcli:
             return False
         
-        result = subprocess.run(['nmcli', 'connection', 'down', 'Hotspot'], capture_output=True)
-        return result.returncode == 0
+        return await self._exec([self._nmcli_path, 'connection', 'down', 'Hotspot'])
 
 
 # Example usage
-if __name__ == '__main__':
+async def _demo():
     nm = NetworkManager()
     
+    async def collect_wifi():
+        return [net async for net in nm.scan_wifi()]
+    
+    interfaces, status, networks, paired = await asyncio.gather(
+        asyncio.to_thread(nm.get_interfaces),
+        nm.get_connection_status(),
+        collect_wifi(),
+        nm.get_paired_devices(),
+    )
+    
     print("Network Interfaces:")
-    for iface in nm.get_interfaces():
+    for iface in interfaces:
         print(f"  {iface.name}: {iface.type} ({iface.state})")
     
-    print("\nConnection Status:", nm.get_connection_status())
+    print("\nConnection Status:", status)
     
     print("\nWiFi Networks:")
-    for net in nm.scan_wifi():
-        status = "●" if net.connected else "○"
-        print(f"  {status} {net.ssid} ({net.signal}%) [{net.security}]")
+    for net in networks:
+        marker = "●" if net.connected else "○"
+        print(f"  {marker} {net.ssid} ({net.signal}%) [{net.security}]")
     
     print("\nBluetooth Paired Devices:")
-    for dev in nm.get_paired_devices():
+    for dev in paired:
         print(f"  {dev.name} ({dev.address})")
+
+
+if __name__ == '__main__':
+    asyncio.run(_demo())
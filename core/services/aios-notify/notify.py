@@ -6,21 +6,55 @@ System notification service with action support.
 
 import os
 import sys
-import json
 import asyncio
 import socket
 import struct
 import signal
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Callable
+from typing import Deque, Dict, List, Optional, Any, Callable, Union, get_origin, get_type_hints
 from datetime import datetime
 from enum import Enum
 import logging
+from collections import deque
+from itertools import islice
+
+# Shared service modules live one directory up (core/services/aios_common)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aios_common.framed_ipc import FramedJsonServer, _dumps, _loads
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('aios-notify')
 
+try:
+    import gi
+    gi.require_version('Notify', '0.7')
+    from gi.repository import Notify
+    HAS_LIBNOTIFY = True
+except (ImportError, ValueError):
+    HAS_LIBNOTIFY = False
+
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write a file via a temp file and rename so readers never see a partial write"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
 
 class Urgency(Enum):
     LOW = 0
@@ -38,64 +72,321 @@ class Notification:
     icon: str = ""
     urgency: Urgency = Urgency.NORMAL
     timeout: int = 5000  # milliseconds, -1 for persistent
-    actions: List[Dict[str, str]] = field(default_factory=list)
+    actions: List[Dict[str, Any]] = field(default_factory=list)
     hints: Dict[str, Any] = field(default_factory=dict)
     timestamp: datetime = field(default_factory=datetime.now)
     read: bool = False
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+    _urgency_name: str = field(default='', init=False, repr=False, compare=False)
+    _timestamp_iso: str = field(default='', init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # urgency and timestamp never change, so serialize them once
+        self._urgency_name = self.urgency.name
+        self._timestamp_iso = self.timestamp.isoformat()
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        # Fields don't change after creation except 'read', which resets the cache
+        if self._cached_dict is not None:
+            return self._cached_dict
+        self._cached_dict = {
             'id': self.id,
             'app_name': self.app_name,
             'summary': self.summary,
             'body': self.body,
             'icon': self.icon,
-            'urgency': self.urgency.name,
+            'urgency': self._urgency_name,
             'timeout': self.timeout,
             'actions': self.actions,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': self._timestamp_iso,
             'read': self.read
         }
+        return self._cached_dict
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Notification':
+        """Rebuild a notification from its serialized history entry"""
+        return cls(
+            id=data['id'],
+            app_name=data.get('app_name', ''),
+            summary=data.get('summary', ''),
+            body=data.get('body', ''),
+            icon=data.get('icon', ''),
+            urgency=Urgency[data.get('urgency', 'NORMAL')],
+            timeout=data.get('timeout', 5000),
+            actions=data.get('actions', []),
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            read=data.get('read', False)
+        )
+
+
+# ==================== IPC Requests ====================
+
+if HAS_MSGSPEC:
+    class _Request(msgspec.Struct, tag_field='cmd', kw_only=True, forbid_unknown_fields=True):
+        """Typed IPC request; the 'cmd' field selects the subclass"""
+else:
+    class _Request:
+        """Typed IPC request; class attributes supply the field defaults"""
+        
+        def __init_subclass__(cls, tag: str = '', **kwargs):
+            super().__init_subclass__(**kwargs)
+            cls.cmd = tag
+        
+        def __init__(self, **fields):
+            # Field-less requests have no annotations of their own
+            hints = get_type_hints(type(self))
+            for name, value in fields.items():
+                if name == 'cmd':
+                    continue
+                if name not in hints:
+                    raise ValueError(f"Unknown field {name!r} for {self.cmd}")
+                expected = get_origin(hints[name]) or hints[name]
+                # bool is an int subclass but not a valid int field
+                if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+                    raise ValueError(f"Expected {expected.__name__} for {name!r}")
+                setattr(self, name, value)
+
+
+class NotifyReq(_Request, tag='notify'):
+    app_name: str = 'AI-OS'
+    summary: str = ''
+    body: str = ''
+    icon: str = ''
+    urgency: str = 'NORMAL'
+    timeout: int = 5000
+    actions: List[Dict[str, Any]] = []
+    replace_id: int = 0
+
+
+class CloseReq(_Request, tag='close'):
+    id: int = 0
+
+
+class InvokeReq(_Request, tag='invoke'):
+    id: int = 0
+    action_key: str = ''
+
+
+class ListReq(_Request, tag='list'):
+    include_read: bool = False
+
+
+class HistoryReq(_Request, tag='history'):
+    limit: int = 50
+
+
+class MarkReadReq(_Request, tag='mark_read'):
+    id: int = 0
+
+
+class MarkAllReadReq(_Request, tag='mark_all_read'):
+    pass
+
+
+class ClearReq(_Request, tag='clear'):
+    pass
 
 
-class NotificationDaemon:
+_REQUEST_TYPES = (NotifyReq, CloseReq, InvokeReq, ListReq, HistoryReq,
+                  MarkReadReq, MarkAllReadReq, ClearReq)
+
+if HAS_MSGSPEC:
+    _request_decoder = msgspec.json.Decoder(Union[_REQUEST_TYPES])
+    _REQUEST_ERRORS = (ValueError, msgspec.DecodeError)
+else:
+    _REQUEST_BY_CMD = {cls.cmd: cls for cls in _REQUEST_TYPES}
+    _REQUEST_ERRORS = (ValueError,)
+
+
+def _parse_request(data: bytes) -> _Request:
+    """Parse one IPC frame into its typed request"""
+    if HAS_MSGSPEC:
+        return _request_decoder.decode(data)
+    fields = _loads(data)
+    cmd = fields.get('cmd')
+    if cmd not in _REQUEST_BY_CMD:
+        raise ValueError(f'Unknown command: {cmd}')
+    return _REQUEST_BY_CMD[cmd](**fields)
+
+
+class NotificationDaemon(FramedJsonServer):
     """Main notification daemon"""
     
     SOCKET_PATH = "/run/aios/notify.sock"
-    HISTORY_PATH = "/var/lib/aios/notifications.json"
+    HISTORY_PATH = "/var/lib/aios/notifications.jsonl"
+    NEXT_ID_PATH = "/var/lib/aios/notify.nextid"
     MAX_HISTORY = 100
+    LISTEN_BACKLOG = 128
+    FLUSH_DELAY = 0.5  # seconds to coalesce history writes
+    # Legacy actions carry a shell command string; only run them when opted in
+    ALLOW_SHELL_ACTIONS = os.environ.get('AIOS_NOTIFY_SHELL_ACTIONS') == '1'
     
     def __init__(self):
         self.notifications: Dict[int, Notification] = {}
-        self.history: List[Dict[str, Any]] = []
+        self._history: Deque[Notification] = deque(maxlen=self.MAX_HISTORY)
         self.next_id = 1
         self.running = False
         self._callbacks: List[Callable[[Notification], None]] = []
+        self._action_handlers: Dict[str, Callable[[Notification, str], None]] = {}
+        self._handlers: Dict[type, Callable[[Any], Any]] = {
+            NotifyReq: self._h_notify,
+            CloseReq: self._h_close,
+            InvokeReq: self._h_invoke,
+            ListReq: self._h_list,
+            HistoryReq: self._h_history,
+            MarkReadReq: self._h_mark_read,
+            MarkAllReadReq: self._h_mark_all_read,
+            ClearReq: self._h_clear,
+        }
+        self._dirty = False
+        self._next_id_dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # History is an append-only JSONL file, compacted once it doubles
+        self._hist_fd: Optional[int] = None
+        self._hist_lines = 0
+        self._rewriting = False
+        self._pending_lines: List[bytes] = []
+        
+        # Talk to the notification server in-process instead of spawning notify-send
+        self._libnotify = HAS_LIBNOTIFY and Notify.init('aios')
         
         self._load_history()
+        self._load_next_id()
     
     def _load_history(self):
         """Load notification history"""
         try:
-            path = Path(self.HISTORY_PATH)
-            if path.exists():
-                with open(path) as f:
-                    self.history = json.load(f)
-                # Get next ID
-                if self.history:
-                    self.next_id = max(n.get('id', 0) for n in self.history) + 1
+            with open(self.HISTORY_PATH, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        self._history.append(Notification.from_dict(_loads(line)))
+                        self._hist_lines += 1
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"Failed to load history: {e}")
     
+    def _load_next_id(self):
+        """Restore the id counter from its sidecar, scanning history only if it's missing"""
+        try:
+            self.next_id = int(Path(self.NEXT_ID_PATH).read_bytes())
+        except (OSError, ValueError):
+            if self._history:
+                self.next_id = max(n.id for n in self._history) + 1
+            return
+        # The sidecar is flushed lazily; never hand out an id already in history
+        if self._history and self._history[-1].id >= self.next_id:
+            self.next_id = self._history[-1].id + 1
+    
+    def _save_next_id(self):
+        """Persist the id counter synchronously"""
+        self._next_id_dirty = False
+        try:
+            _write_atomic(Path(self.NEXT_ID_PATH), str(self.next_id).encode())
+        except Exception as e:
+            logger.error(f"Failed to save next id: {e}")
+    
+    def _history_bytes(self) -> bytes:
+        """Serialize the retained history as JSONL"""
+        return b''.join(_dumps(n.to_dict()) + b'\n' for n in self._history)
+    
+    def _open_history(self) -> bool:
+        """(Re)open the history file for appending"""
+        if self._hist_fd is not None:
+            os.close(self._hist_fd)
+            self._hist_fd = None
+        try:
+            os.makedirs(os.path.dirname(self.HISTORY_PATH), exist_ok=True)
+            self._hist_fd = os.open(self.HISTORY_PATH,
+                                    os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            return True
+        except OSError as e:
+            logger.error(f"Failed to open history: {e}")
+            return False
+    
+    def _append_history(self, notification: Notification):
+        """Append one notification to the history file"""
+        line = _dumps(notification.to_dict()) + b'\n'
+        self._hist_lines += 1
+        if self._rewriting:
+            # A compaction is replacing the file; append once it lands
+            self._pending_lines.append(line)
+        elif self._hist_fd is not None or self._open_history():
+            try:
+                os.write(self._hist_fd, line)
+            except OSError as e:
+                logger.error(f"Failed to append history: {e}")
+        
+        if self._hist_lines >= 2 * self.MAX_HISTORY:
+            self._schedule_flush()
+    
     def _save_history(self):
-        """Save notification history"""
+        """Rewrite notification history synchronously"""
+        self._dirty = False
+        try:
+            _write_atomic(Path(self.HISTORY_PATH), self._history_bytes())
+            self._hist_lines = len(self._history)
+            self._open_history()
+        except Exception as e:
+            logger.error(f"Failed to save history: {e}")
+    
+    def _schedule_flush(self):
+        """Mark history dirty and coalesce writes into one deferred flush"""
+        self._dirty = True
+        self._request_flush()
+    
+    def _request_flush(self):
+        """Arm the deferred flush timer if it isn't already pending"""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. used as a library) - write immediately
+            self._flush_sync()
+            return
+        self._flush_handle = loop.call_later(
+            self.FLUSH_DELAY, lambda: asyncio.create_task(self._flush())
+        )
+    
+    def _flush_sync(self):
+        """Write whatever is dirty on the calling thread"""
+        if self._next_id_dirty:
+            self._save_next_id()
+        if self._dirty:
+            self._save_history()
+    
+    async def _flush(self):
+        """Compact dirty history off the event loop"""
+        self._flush_handle = None
+        loop = asyncio.get_running_loop()
+        if self._next_id_dirty:
+            self._next_id_dirty = False
+            try:
+                await loop.run_in_executor(
+                    None, _write_atomic, Path(self.NEXT_ID_PATH), str(self.next_id).encode()
+                )
+            except Exception as e:
+                logger.error(f"Failed to save next id: {e}")
+        if not self._dirty:
+            return
+        self._dirty = False
+        data = self._history_bytes()
+        self._rewriting = True
         try:
-            path = Path(self.HISTORY_PATH)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with open(path, 'w') as f:
-                json.dump(self.history[-self.MAX_HISTORY:], f)
+            await loop.run_in_executor(
+                None, _write_atomic, Path(self.HISTORY_PATH), data
+            )
         except Exception as e:
             logger.error(f"Failed to save history: {e}")
+        finally:
+            self._rewriting = False
+            pending, self._pending_lines = self._pending_lines, []
+            self._hist_lines = len(self._history)
+            if self._open_history():
+                for line in pending:
+                    os.write(self._hist_fd, line)
     
     def notify(
         self,
@@ -105,7 +396,7 @@ class NotificationDaemon:
         icon: str = "",
         urgency: Urgency = Urgency.NORMAL,
         timeout: int = 5000,
-        actions: List[Dict[str, str]] = None,
+        actions: List[Dict[str, Any]] = None,
         hints: Dict[str, Any] = None,
         replace_id: int = 0
     ) -> int:
@@ -117,6 +408,8 @@ class NotificationDaemon:
         else:
             notif_id = self.next_id
             self.next_id += 1
+            self._next_id_dirty = True
+            self._request_flush()
         
         notification = Notification(
             id=notif_id,
@@ -131,8 +424,8 @@ class NotificationDaemon:
         )
         
         self.notifications[notif_id] = notification
-        self.history.append(notification.to_dict())
-        self._save_history()
+        self._history.append(notification)
+        self._append_history(notification)
         
         # Display notification
         self._display_notification(notification)
@@ -149,6 +442,19 @@ class NotificationDaemon:
     
     def _display_notification(self, notification: Notification):
         """Display notification to user"""
+        if self._libnotify:
+            try:
+                n = Notify.Notification.new(
+                    notification.summary, notification.body or None, notification.icon or None
+                )
+                n.set_urgency(Notify.Urgency(notification.urgency.value))
+                if notification.timeout > 0:
+                    n.set_timeout(notification.timeout)
+                n.show()
+                return
+            except Exception as e:
+                logger.debug(f"libnotify failed: {e}")
+        
         # Try to use native notification display
         try:
             # Construct notify-send command
@@ -185,24 +491,53 @@ class NotificationDaemon:
             return True
         return False
     
-    def invoke_action(self, notif_id: int, action_key: str) -> bool:
-        """Invoke a notification action"""
+    async def invoke_action(self, notif_id: int, action_key: str) -> bool:
+        """Invoke a notification action
+        
+        Actions are ``{'key': ..., 'argv': [...]}`` to run a program directly,
+        or ``{'key': ..., 'handler_id': ...}`` to call a handler registered
+        with ``add_action_handler``.
+        """
         if notif_id not in self.notifications:
             return False
         
         notification = self.notifications[notif_id]
         
         for action in notification.actions:
-            if action.get('key') == action_key:
-                callback = action.get('callback')
-                if callback:
-                    try:
-                        # Execute callback
-                        os.system(callback)
-                        return True
-                    except Exception as e:
-                        logger.error(f"Action callback failed: {e}")
-                break
+            if action.get('key') != action_key:
+                continue
+            try:
+                if action.get('handler_id'):
+                    handler = self._action_handlers.get(action['handler_id'])
+                    if handler is None:
+                        logger.warning(f"No handler registered for {action['handler_id']}")
+                        return False
+                    handler(notification, action_key)
+                    return True
+                
+                if action.get('argv'):
+                    await asyncio.create_subprocess_exec(
+                        *action['argv'],
+                        stdin=asyncio.subprocess.DEVNULL,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                    return True
+                
+                if action.get('callback'):
+                    if not self.ALLOW_SHELL_ACTIONS:
+                        logger.warning(f"Refusing shell callback for action {action_key}")
+                        return False
+                    await asyncio.create_subprocess_shell(
+                        action['callback'],
+                        stdin=asyncio.subprocess.DEVNULL,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                    return True
+            except Exception as e:
+                logger.error(f"Action callback failed: {e}")
+            break
         
         return False
     
@@ -215,13 +550,18 @@ class NotificationDaemon:
         return result
     
     def get_history(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get notification history"""
-        return self.history[-limit:]
+        """Get notification history, oldest first"""
+        recent = [n.to_dict() for n in islice(reversed(self._history), limit)]
+        recent.reverse()
+        return recent
     
     def mark_read(self, notif_id: int) -> bool:
         """Mark notification as read"""
         if notif_id in self.notifications:
-            self.notifications[notif_id].read = True
+            notif = self.notifications[notif_id]
+            notif.read = True
+            notif._cached_dict = None
+            self._schedule_flush()
             return True
         return False
     
@@ -229,6 +569,8 @@ class NotificationDaemon:
         """Mark all notifications as read"""
         for notif in self.notifications.values():
             notif.read = True
+            notif._cached_dict = None
+        self._schedule_flush()
     
     def clear_all(self):
         """Clear all notifications"""
@@ -238,6 +580,10 @@ class NotificationDaemon:
         """Add notification callback"""
         self._callbacks.append(callback)
     
+    def add_action_handler(self, handler_id: str, handler: Callable[[Notification, str], None]):
+        """Register an in-process handler for actions that name ``handler_id``"""
+        self._action_handlers[handler_id] = handler
+    
     async def start_server(self):
         """Start IPC server"""
         logger.info("Starting notification daemon...")
@@ -253,7 +599,8 @@ class NotificationDaemon:
         
         server = await asyncio.start_unix_server(
             self._handle_client,
-            path=self.SOCKET_PATH
+            path=self.SOCKET_PATH,
+            backlog=self.LISTEN_BACKLOG
         )
         
         os.chmod(self.SOCKET_PATH, 0o666)
@@ -263,115 +610,149 @@ class NotificationDaemon:
         async with server:
             await server.serve_forever()
     
-    async def _handle_client(self, reader, writer):
-        """Handle IPC client"""
-        try:
-            while True:
-                length_data = await reader.read(4)
-                if not length_data:
-                    break
-                
-                length = struct.unpack('!I', length_data)[0]
-                data = await reader.read(length)
-                
-                request = json.loads(data.decode())
-                response = self._process_request(request)
-                
-                response_data = json.dumps(response).encode()
-                writer.write(struct.pack('!I', len(response_data)))
-                writer.write(response_data)
-                await writer.drain()
-                
-        except Exception as e:
-            logger.error(f"Client error: {e}")
-        finally:
-            writer.close()
-            await writer.wait_closed()
+    REQUEST_ERRORS = _REQUEST_ERRORS
+    
+    def _decode_request(self, data: bytes) -> _Request:
+        return _parse_request(data)
     
-    def _process_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    async def _process_request(self, request: _Request) -> Dict[str, Any]:
         """Process IPC request"""
-        cmd = request.get('cmd')
-        
-        if cmd == 'notify':
-            notif_id = self.notify(
-                app_name=request.get('app_name', 'AI-OS'),
-                summary=request.get('summary', ''),
-                body=request.get('body', ''),
-                icon=request.get('icon', ''),
-                urgency=Urgency[request.get('urgency', 'NORMAL')],
-                timeout=request.get('timeout', 5000),
-                actions=request.get('actions', []),
-                replace_id=request.get('replace_id', 0)
-            )
-            return {'status': 'ok', 'id': notif_id}
-        
-        elif cmd == 'close':
-            success = self.close_notification(request.get('id', 0))
-            return {'status': 'ok' if success else 'error'}
-        
-        elif cmd == 'invoke':
-            success = self.invoke_action(
-                request.get('id', 0),
-                request.get('action_key', '')
-            )
-            return {'status': 'ok' if success else 'error'}
-        
-        elif cmd == 'list':
-            return {
-                'status': 'ok',
-                'notifications': self.get_notifications(
-                    include_read=request.get('include_read', False)
-                )
-            }
-        
-        elif cmd == 'history':
-            return {
-                'status': 'ok',
-                'history': self.get_history(request.get('limit', 50))
-            }
-        
-        elif cmd == 'mark_read':
-            self.mark_read(request.get('id', 0))
-            return {'status': 'ok'}
-        
-        elif cmd == 'mark_all_read':
-            self.mark_all_read()
-            return {'status': 'ok'}
-        
-        elif cmd == 'clear':
-            self.clear_all()
-            return {'status': 'ok'}
-        
-        else:
-            return {'status': 'error', 'message': f'Unknown command: {cmd}'}
+        response = self._handlers[type(request)](request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+    
+    def _h_notify(self, request: NotifyReq) -> Dict[str, Any]:
+        # Clients such as libaios send lowercase names
+        try:
+            urgency = Urgency[str(request.urgency).upper()]
+        except KeyError:
+            return {'status': 'error', 'message': f"Unknown urgency: {request.urgency!r}"}
+        notif_id = self.notify(
+            app_name=request.app_name,
+            summary=request.summary,
+            body=request.body,
+            icon=request.icon,
+            urgency=urgency,
+            timeout=request.timeout,
+            actions=request.actions,
+            replace_id=request.replace_id
+        )
+        return {'status': 'ok', 'id': notif_id}
+    
+    def _h_close(self, request: CloseReq) -> Dict[str, Any]:
+        success = self.close_notification(request.id)
+        return {'status': 'ok' if success else 'error'}
+    
+    async def _h_invoke(self, request: InvokeReq) -> Dict[str, Any]:
+        success = await self.invoke_action(request.id, request.action_key)
+        return {'status': 'ok' if success else 'error'}
+    
+    def _h_list(self, request: ListReq) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'notifications': self.get_notifications(include_read=request.include_read)
+        }
+    
+    def _h_history(self, request: HistoryReq) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'history': self.get_history(request.limit)
+        }
+    
+    def _h_mark_read(self, request: MarkReadReq) -> Dict[str, Any]:
+        self.mark_read(request.id)
+        return {'status': 'ok'}
+    
+    def _h_mark_all_read(self, request: MarkAllReadReq) -> Dict[str, Any]:
+        self.mark_all_read()
+        return {'status': 'ok'}
+    
+    def _h_clear(self, request: ClearReq) -> Dict[str, Any]:
+        self.clear_all()
+        return {'status': 'ok'}
     
     def stop(self):
         """Stop the daemon"""
         self.running = False
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._flush_sync()
+        if self._hist_fd is not None:
+            os.close(self._hist_fd)
+            self._hist_fd = None
         if os.path.exists(self.SOCKET_PATH):
             os.unlink(self.SOCKET_PATH)
 
 
 # Client helper
 class NotifyClient:
-    """Client for notification daemon"""
+    """Client for notification daemon
+    
+    Keeps one connection open across calls; use as a context manager or
+    call ``close()`` when done.
+    """
     
     SOCKET_PATH = "/run/aios/notify.sock"
+    RECV_SIZE = 65536
+    
+    def __init__(self):
+        self._sock: Optional[socket.socket] = None
+        self._scratch = bytearray(self.RECV_SIZE)
+        self._pending = bytearray()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._pending.clear()
+    
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.SOCKET_PATH)
+            self._sock = sock
+        return self._sock
+    
+    def _recv_exact(self, n: int) -> bytes:
+        """Read exactly n bytes, buffering any extra for the next frame"""
+        while len(self._pending) < n:
+            got = self._sock.recv_into(self._scratch)
+            if not got:
+                raise ConnectionError("Connection closed by daemon")
+            self._pending += memoryview(self._scratch)[:got]
+        data = bytes(self._pending[:n])
+        del self._pending[:n]
+        return data
+    
+    def _recv_frame(self) -> Dict[str, Any]:
+        length = struct.unpack('!I', self._recv_exact(4))[0]
+        return _loads(self._recv_exact(length))
     
     def send(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        return self.send_many([msg])[0]
+    
+    def send_many(self, msgs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Pipeline several requests in one write and collect their responses"""
         try:
-            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
-                sock.connect(self.SOCKET_PATH)
-                data = json.dumps(msg).encode()
-                sock.sendall(struct.pack('!I', len(data)))
-                sock.sendall(data)
-                
-                length_data = sock.recv(4)
-                length = struct.unpack('!I', length_data)[0]
-                response = sock.recv(length)
-                return json.loads(response.decode())
+            sock = self._connect()
+            frames = bytearray()
+            for msg in msgs:
+                data = _dumps(msg)
+                frames += struct.pack('!I', len(data))
+                frames += data
+            sock.sendall(frames)
+            return [self._recv_frame() for _ in msgs]
         except Exception as e:
-            return {'error': str(e)}
+            self.close()
+            return [{'error': str(e)} for _ in msgs]
     
     def notify(self, summary: str, body: str = "", **kwargs) -> int:
         result = self.send({
@@ -397,6 +778,9 @@ def main():
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
+    if HAS_UVLOOP:
+        uvloop.install()
+    
     asyncio.run(daemon.start_server())
 
 
@@ -10,16 +10,41 @@ import asyncio
 import signal
 import json
 import socket
-import struct
+import time
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
 from enum import Enum
 import logging
 
+# Shared service modules live one directory up (core/services/aios_common)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aios_common.framed_ipc import FramedJsonServer
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('aios-power')
 
+try:
+    from dbus_next import BusType
+    from dbus_next.aio import MessageBus
+    HAS_DBUS = True
+except ImportError:
+    HAS_DBUS = False
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
+LOGIN1_NAME = 'org.freedesktop.login1'
+LOGIN1_PATH = '/org/freedesktop/login1'
+PPD_NAME = 'net.hadess.PowerProfiles'
+PPD_PATH = '/net/hadess/PowerProfiles'
+
+# Kernel uevent netlink family (not exported by the socket module)
+NETLINK_KOBJECT_UEVENT = 15
+
 
 class PowerProfile(Enum):
     PERFORMANCE = "performance"
@@ -27,6 +52,11 @@ class PowerProfile(Enum):
     POWERSAVE = "powersave"
 
 
+# power-profiles-daemon names that differ from ours
+_PPD_NAMES = {PowerProfile.POWERSAVE: "power-saver"}
+_PPD_PROFILES = {v: k for k, v in _PPD_NAMES.items()}
+
+
 class PowerState(Enum):
     RUNNING = "running"
     SUSPENDED = "suspended"
@@ -56,17 +86,41 @@ class PowerConfig:
     default_profile: PowerProfile = PowerProfile.BALANCED
 
 
-class PowerManager:
+class PowerManager(FramedJsonServer):
     """AI-OS Power Manager"""
     
     CONFIG_PATH = Path("/etc/aios/power.json")
     SOCKET_PATH = "/run/aios/power.sock"
+    # Safety-net poll when power_supply uevents are being delivered
+    UEVENT_WATCHDOG = 300
+    POLL_INTERVAL = 60
+    PROFILE_TTL = 2.0  # seconds before re-reading the active profile
     
     def __init__(self):
         self.config = PowerConfig()
         self.current_profile = PowerProfile.BALANCED
         self.running = False
+        self._bat_uevent_fd: Optional[int] = None
+        self._ac_online_fds: List[int] = []
+        self._backlight: Optional[Tuple[int, int]] = None  # (brightness fd, max)
+        self._bus = None
+        self._login1 = None
+        self._ppd = None
+        self._profile_cache: Optional[PowerProfile] = None
+        self._profile_cache_ts = 0.0
+        self._uevent_sock: Optional[socket.socket] = None
+        self._battery_changed = asyncio.Event()
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {
+            'battery': self._h_battery,
+            'profile': self._h_profile,
+            'suspend': self._h_suspend,
+            'hibernate': self._h_hibernate,
+            'poweroff': self._h_poweroff,
+            'reboot': self._h_reboot,
+            'brightness': self._h_brightness,
+        }
         self._load_config()
+        self._rescan_sysfs()
     
     def _load_config(self):
         """Load power configuration"""
@@ -104,23 +158,65 @@ class PowerManager:
     
     # ==================== Battery ====================
     
+    def _rescan_sysfs(self):
+        """Resolve battery, AC adapter and backlight sysfs handles"""
+        self._open_battery()
+        self._open_ac()
+        self._open_backlight()
+    
+    def _open_ac(self):
+        """Open the online attribute of every AC adapter"""
+        for fd in self._ac_online_fds:
+            os.close(fd)
+        self._ac_online_fds = []
+        supply = Path("/sys/class/power_supply")
+        for ac_path in [*supply.glob("AC*"), *supply.glob("ADP*")]:
+            try:
+                self._ac_online_fds.append(os.open(str(ac_path / "online"), os.O_RDONLY))
+            except OSError:
+                pass
+    
+    def _open_backlight(self):
+        """Open the first backlight device for reading and writing"""
+        if self._backlight is not None:
+            os.close(self._backlight[0])
+            self._backlight = None
+        try:
+            device = next(Path("/sys/class/backlight").iterdir(), None)
+            if device is not None:
+                max_val = int((device / "max_brightness").read_text().strip())
+                self._backlight = (os.open(str(device / "brightness"), os.O_RDWR), max_val)
+        except Exception as e:
+            logger.debug(f"No usable backlight: {e}")
+    
+    def _open_battery(self):
+        """Open the battery's uevent file once for repeated polling"""
+        self._close_battery()
+        bat_paths = sorted(Path("/sys/class/power_supply").glob("BAT*"))
+        if not bat_paths:
+            return
+        try:
+            self._bat_uevent_fd = os.open(str(bat_paths[0] / "uevent"), os.O_RDONLY)
+        except OSError as e:
+            logger.debug(f"Battery uevent unavailable: {e}")
+    
+    def _close_battery(self):
+        """Close the cached battery uevent fd"""
+        if self._bat_uevent_fd is not None:
+            os.close(self._bat_uevent_fd)
+            self._bat_uevent_fd = None
+    
     def get_battery_info(self) -> Optional[BatteryInfo]:
         """Get battery information"""
-        bat_paths = list(Path("/sys/class/power_supply").glob("BAT*"))
-        
-        if not bat_paths:
+        if self._bat_uevent_fd is None:
             return None
         
-        bat_path = bat_paths[0]
-        
         try:
-            def read_file(name: str, default: str = "") -> str:
-                path = bat_path / name
-                if path.exists():
-                    return path.read_text().strip()
-                return default
+            # uevent carries every attribute as POWER_SUPPLY_<NAME>=value lines
+            data = os.pread(self._bat_uevent_fd, 4096, 0)
+            fields = dict(line.split(b'=', 1) for line in data.splitlines() if b'=' in line)
             
-            present = read_file("present", "0") == "1"
+            present = fields.get(b'POWER_SUPPLY_PRESENT') == b'1'
             if not present:
                 return BatteryInfo(
                     present=False, level=0, status="Unknown",
@@ -128,15 +224,15 @@ class PowerManager:
                 )
             
             # Get capacity
-            level = int(read_file("capacity", "0"))
+            level = int(fields.get(b'POWER_SUPPLY_CAPACITY', b'0'))
             
             # Get status
-            status = read_file("status", "Unknown")
+            status = fields.get(b'POWER_SUPPLY_STATUS', b'Unknown').decode()
             
             # Get time estimates
-            energy_now = int(read_file("energy_now", "0"))
-            energy_full = int(read_file("energy_full", "0"))
-            power_now = int(read_file("power_now", "1"))
+            energy_now = int(fields.get(b'POWER_SUPPLY_ENERGY_NOW', b'0'))
+            energy_full = int(fields.get(b'POWER_SUPPLY_ENERGY_FULL', b'0'))
+            power_now = int(fields.get(b'POWER_SUPPLY_POWER_NOW', b'1'))
             
             time_to_empty = 0
             time_to_full = 0
@@ -153,43 +249,83 @@ class PowerManager:
                 status=status,
                 time_to_empty=time_to_empty,
                 time_to_full=time_to_full,
-                health=read_file("health", "Unknown"),
-                technology=read_file("technology", "Unknown")
+                health=fields.get(b'POWER_SUPPLY_HEALTH', b'Unknown').decode(),
+                technology=fields.get(b'POWER_SUPPLY_TECHNOLOGY', b'Unknown').decode()
             )
             
+        except OSError as e:
+            # Battery went away; rescan on the next poll
+            logger.error(f"Failed to get battery info: {e}")
+            self._open_battery()
+            return None
         except Exception as e:
             logger.error(f"Failed to get battery info: {e}")
             return None
     
     def is_on_battery(self) -> bool:
         """Check if running on battery"""
-        ac_paths = list(Path("/sys/class/power_supply").glob("AC*")) + \
-                   list(Path("/sys/class/power_supply").glob("ADP*"))
-        
-        for ac_path in ac_paths:
-            online_file = ac_path / "online"
-            if online_file.exists():
-                if online_file.read_text().strip() == "1":
+        for fd in self._ac_online_fds:
+            try:
+                if os.pread(fd, 2, 0).strip() == b"1":
                     return False
+            except OSError:
+                pass
         
         # No AC adapter found or all offline
         battery = self.get_battery_info()
         return battery is not None and battery.present
     
+    # ==================== D-Bus ====================
+    
+    async def _connect_bus(self):
+        """Connect to the system bus and cache logind/power-profiles proxies"""
+        if not HAS_DBUS:
+            logger.warning("dbus-next not installed, falling back to shell commands")
+            return
+        try:
+            self._bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+        except Exception as e:
+            logger.warning(f"System bus unavailable: {e}")
+            return
+        
+        self._login1 = await self._get_interface(LOGIN1_NAME, LOGIN1_PATH, 'org.freedesktop.login1.Manager')
+        self._ppd = await self._get_interface(PPD_NAME, PPD_PATH, PPD_NAME)
+    
+    async def _get_interface(self, name: str, path: str, interface: str):
+        """Introspect a bus object and return an interface proxy, or None"""
+        try:
+            introspection = await self._bus.introspect(name, path)
+            return self._bus.get_proxy_object(name, path, introspection).get_interface(interface)
+        except Exception as e:
+            logger.debug(f"{name} unavailable: {e}")
+            return None
+    
+    async def _login1_call(self, method: str, shell_cmd: str) -> bool:
+        """Call a logind Manager method, falling back to a shell command"""
+        if self._login1 is not None:
+            try:
+                await getattr(self._login1, f'call_{method}')(False)
+                return True
+            except Exception as e:
+                logger.error(f"logind {method} failed: {e}")
+        logger.warning(f"Falling back to '{shell_cmd}'")
+        return os.system(shell_cmd) == 0
+    
     # ==================== Power Profiles ====================
     
-    def set_profile(self, profile: PowerProfile) -> bool:
+    async def set_profile(self, profile: PowerProfile) -> bool:
         """Set power profile"""
         self.current_profile = profile
+        self._profile_cache = profile
+        self._profile_cache_ts = time.monotonic()
         
-        try:
-            # Try powerprofiles daemon
-            result = os.system(f'powerprofilesctl set {profile.value}')
-            if result == 0:
+        if self._ppd is not None:
+            try:
+                await self._ppd.set_active_profile(_PPD_NAMES.get(profile, profile.value))
                 logger.info(f"Set power profile: {profile.value}")
                 return True
-        except:
-            pass
+            except Exception as e:
+                logger.debug(f"power-profiles-daemon failed: {e}")
         
         try:
             # Try CPU governor directly
@@ -212,45 +348,57 @@ class PowerManager:
             logger.error(f"Failed to set profile: {e}")
             return False
     
-    def get_profile(self) -> PowerProfile:
+    async def get_profile(self) -> PowerProfile:
         """Get current power profile"""
-        try:
-            # Try powerprofiles daemon
-            import subprocess
-            result = subprocess.run(['powerprofilesctl', 'get'], capture_output=True, text=True)
-            if result.returncode == 0:
-                profile_str = result.stdout.strip()
-                return PowerProfile(profile_str)
-        except:
-            pass
+        now = time.monotonic()
+        if self._profile_cache is not None and now - self._profile_cache_ts < self.PROFILE_TTL:
+            return self._profile_cache
+        
+        profile = self.current_profile
+        if self._ppd is not None:
+            try:
+                name = await self._ppd.get_active_profile()
+                profile = _PPD_PROFILES.get(name) or PowerProfile(name)
+            except Exception as e:
+                logger.debug(f"power-profiles-daemon query failed: {e}")
         
-        return self.current_profile
+        self._profile_cache = profile
+        self._profile_cache_ts = now
+        return profile
     
     # ==================== Power Actions ====================
     
-    def suspend(self) -> bool:
+    async def suspend(self) -> bool:
         """Suspend to RAM"""
         logger.info("Suspending system...")
-        return os.system('systemctl suspend') == 0
+        return await self._login1_call('suspend', 'systemctl suspend')
     
-    def hibernate(self) -> bool:
+    async def hibernate(self) -> bool:
         """Hibernate to disk"""
         logger.info("Hibernating system...")
-        return os.system('systemctl hibernate') == 0
+        return await self._login1_call('hibernate', 'systemctl hibernate')
     
-    def poweroff(self) -> bool:
+    async def poweroff(self) -> bool:
         """Power off the system"""
         logger.info("Powering off...")
-        return os.system('systemctl poweroff') == 0
+        return await self._login1_call('power_off', 'systemctl poweroff')
     
-    def reboot(self) -> bool:
+    async def reboot(self) -> bool:
         """Reboot the system"""
         logger.info("Rebooting...")
-        return os.system('systemctl reboot') == 0
+        return await self._login1_call('reboot', 'systemctl reboot')
     
-    def lock_screen(self) -> bool:
+    async def lock_screen(self) -> bool:
         """Lock the screen"""
+        if self._login1 is not None:
+            try:
+                await self._login1.call_lock_sessions()
+                return True
+            except Exception as e:
+                logger.debug(f"logind LockSessions failed: {e}")
+        
         # Try various lock mechanisms
+        logger.warning("Falling back to shell lock commands")
         for cmd in ['loginctl lock-session', 'swaylock', 'i3lock', 'xdg-screensaver lock']:
             if os.system(cmd) == 0:
                 return True
@@ -260,22 +408,24 @@ class PowerManager:
     
     def get_brightness(self) -> int:
         """Get screen brightness (0-100)"""
+        if self._backlight is None:
+            return -1
+        fd, max_val = self._backlight
         try:
-            for device in Path("/sys/class/backlight").iterdir():
-                current = int((device / "brightness").read_text().strip())
-                max_val = int((device / "max_brightness").read_text().strip())
-                return int(current * 100 / max_val)
-        except:
+            current = int(os.pread(fd, 16, 0))
+            return int(current * 100 / max_val)
+        except Exception:
             return -1
     
     def set_brightness(self, level: int) -> bool:
         """Set screen brightness (0-100)"""
+        if self._backlight is None:
+            return False
+        fd, max_val = self._backlight
         try:
-            for device in Path("/sys/class/backlight").iterdir():
-                max_val = int((device / "max_brightness").read_text().strip())
-                value = int(max_val * level / 100)
-                (device / "brightness").write_text(str(value))
-                return True
+            value = int(max_val * level / 100)
+            os.pwrite(fd, str(value).encode(), 0)
+            return True
         except Exception as e:
             logger.error(f"Failed to set brightness: {e}")
             return False
@@ -289,29 +439,76 @@ class PowerManager:
     
     # ==================== Monitoring ====================
     
+    def _open_uevent(self) -> Optional[socket.socket]:
+        """Subscribe to kernel uevents so battery changes wake the monitor"""
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                                 NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, 1))  # kernel-assigned port, group 1 = kernel events
+            sock.setblocking(False)
+            return sock
+        except (OSError, AttributeError) as e:
+            logger.warning(f"uevent netlink unavailable, polling instead: {e}")
+            return None
+    
+    def _on_uevent(self):
+        """Drain pending uevents and flag power_supply changes"""
+        try:
+            while True:
+                fields = self._uevent_sock.recv(8192).split(b'\x00')
+                if b'SUBSYSTEM=power_supply' not in fields:
+                    continue
+                if b'ACTION=add' in fields or b'ACTION=remove' in fields:
+                    self._rescan_sysfs()
+                self._battery_changed.set()
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            logger.debug(f"uevent read failed: {e}")
+    
     async def _battery_monitor(self):
         """Monitor battery and take action on low battery"""
-        while self.running:
-            battery = self.get_battery_info()
-            
-            if battery and battery.present and battery.status == "Discharging":
-                if battery.level <= self.config.critical_battery_threshold:
-                    logger.critical(f"Critical battery: {battery.level}%")
-                    # Show critical notification
-                    self._notify("Critical Battery", 
-                               f"Battery at {battery.level}%. System will suspend soon.",
-                               "critical")
-                    await asyncio.sleep(30)
+        loop = asyncio.get_running_loop()
+        self._uevent_sock = self._open_uevent()
+        if self._uevent_sock is not None:
+            loop.add_reader(self._uevent_sock.fileno(), self._on_uevent)
+            interval = self.UEVENT_WATCHDOG
+        else:
+            interval = self.POLL_INTERVAL
+        
+        try:
+            while self.running:
+                # A single sysfs pread; kept on the loop thread, which owns the fds
+                battery = self.get_battery_info()
+                
+                if battery and battery.present and battery.status == "Discharging":
                     if battery.level <= self.config.critical_battery_threshold:
-                        self.suspend()
-                        
-                elif battery.level <= self.config.low_battery_threshold:
-                    logger.warning(f"Low battery: {battery.level}%")
-                    self._notify("Low Battery", 
-                               f"Battery at {battery.level}%. Please connect charger.",
-                               "normal")
-            
-            await asyncio.sleep(60)  # Check every minute
+                        logger.critical(f"Critical battery: {battery.level}%")
+                        # Show critical notification
+                        self._notify("Critical Battery", 
+                                   f"Battery at {battery.level}%. System will suspend soon.",
+                                   "critical")
+                        await asyncio.sleep(30)
+                        if battery.level <= self.config.critical_battery_threshold:
+                            await self.suspend()
+                            
+                    elif battery.level <= self.config.low_battery_threshold:
+                        logger.warning(f"Low battery: {battery.level}%")
+                        self._notify("Low Battery", 
+                                   f"Battery at {battery.level}%. Please connect charger.",
+                                   "normal")
+                
+                # Sleep until the kernel reports a change, or the watchdog fires
+                try:
+                    await asyncio.wait_for(self._battery_changed.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._battery_changed.clear()
+        finally:
+            if self._uevent_sock is not None:
+                loop.remove_reader(self._uevent_sock.fileno())
+                self._uevent_sock.close()
+                self._uevent_sock = None
     
     def _notify(self, title: str, message: str, urgency: str = "normal"):
         """Send notification"""
@@ -331,11 +528,13 @@ class PowerManager:
         
         self.running = True
         
+        await self._connect_bus()
+        
         # Start battery monitor
         asyncio.create_task(self._battery_monitor())
         
         # Apply default profile
-        self.set_profile(self.current_profile)
+        await self.set_profile(self.current_profile)
         
         server = await asyncio.start_unix_server(
             self._handle_client,
@@ -349,86 +548,63 @@ class PowerManager:
         async with server:
             await server.serve_forever()
     
-    async def _handle_client(self, reader, writer):
-        """Handle IPC client"""
-        try:
-            while True:
-                length_data = await reader.read(4)
-                if not length_data:
-                    break
-                
-                length = struct.unpack('!I', length_data)[0]
-                data = await reader.read(length)
-                
-                request = json.loads(data.decode())
-                response = self._process_request(request)
-                
-                response_data = json.dumps(response).encode()
-                writer.write(struct.pack('!I', len(response_data)))
-                writer.write(response_data)
-                await writer.drain()
-                
-        except Exception as e:
-            logger.error(f"Client error: {e}")
-        finally:
-            writer.close()
-            await writer.wait_closed()
-    
-    def _process_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    async def _process_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Process IPC request"""
         cmd = request.get('cmd')
-        
-        if cmd == 'battery':
-            battery = self.get_battery_info()
-            if battery:
-                return {
-                    'status': 'ok',
-                    'battery': {
-                        'present': battery.present,
-                        'level': battery.level,
-                        'status': battery.status,
-                        'time_to_empty': battery.time_to_empty,
-                        'time_to_full': battery.time_to_full
-                    }
+        handler = self._handlers.get(cmd)
+        if handler is None:
+            return {'status': 'error', 'message': f'Unknown command: {cmd}'}
+        return await handler(request)
+    
+    async def _h_battery(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        battery = self.get_battery_info()
+        if battery:
+            return {
+                'status': 'ok',
+                'battery': {
+                    'present': battery.present,
+                    'level': battery.level,
+                    'status': battery.status,
+                    'time_to_empty': battery.time_to_empty,
+                    'time_to_full': battery.time_to_full
                 }
-            return {'status': 'ok', 'battery': None}
-        
-        elif cmd == 'profile':
-            if 'set' in request:
-                profile = PowerProfile(request['set'])
-                success = self.set_profile(profile)
-                return {'status': 'ok' if success else 'error'}
-            else:
-                return {'status': 'ok', 'profile': self.get_profile().value}
-        
-        elif cmd == 'suspend':
-            success = self.suspend()
-            return {'status': 'ok' if success else 'error'}
-        
-        elif cmd == 'hibernate':
-            success = self.hibernate()
-            return {'status': 'ok' if success else 'error'}
-        
-        elif cmd == 'poweroff':
-            success = self.poweroff()
+            }
+        return {'status': 'ok', 'battery': None}
+    
+    async def _h_profile(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if 'set' in request:
+            profile = PowerProfile(request['set'])
+            success = await self.set_profile(profile)
             return {'status': 'ok' if success else 'error'}
-        
-        elif cmd == 'reboot':
-            success = self.reboot()
+        return {'status': 'ok', 'profile': (await self.get_profile()).value}
+    
+    async def _h_suspend(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'status': 'ok' if await self.suspend() else 'error'}
+    
+    async def _h_hibernate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'status': 'ok' if await self.hibernate() else 'error'}
+    
+    async def _h_poweroff(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'status': 'ok' if await self.poweroff() else 'error'}
+    
+    async def _h_reboot(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'status': 'ok' if await self.reboot() else 'error'}
+    
+    async def _h_brightness(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if 'set' in request:
+            success = self.set_brightness(request['set'])
             return {'status': 'ok' if success else 'error'}
-        
-        elif cmd == 'brightness':
-            if 'set' in request:
-                success = self.set_brightness(request['set'])
-                return {'status': 'ok' if success else 'error'}
-            else:
-                return {'status': 'ok', 'brightness': self.get_brightness()}
-        
-        else:
-            return {'status': 'error', 'message': f'Unknown command: {cmd}'}
+        return {'status': 'ok', 'brightness': self.get_brightness()}
     
     def stop(self):
         self.running = False
+        self._close_battery()
+        for fd in self._ac_online_fds:
+            os.close(fd)
+        self._ac_online_fds = []
+        if self._backlight is not None:
+            os.close(self._backlight[0])
+            self._backlight = None
         if os.path.exists(self.SOCKET_PATH):
             os.unlink(self.SOCKET_PATH)
 
@@ -443,6 +619,9 @@ def main():
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
+    if HAS_UVLOOP:
+        uvloop.install()
+    
     asyncio.run(manager.start_server())
 
 
@@ -5,38 +5,105 @@ Handles wake word detection, speech recognition, and TTS.
 """
 
 import os
+import re
 import sys
-import json
-import socket
-import struct
+import hashlib
+import shutil
 import signal
 import logging
+import logging.handlers
+import math
+import queue
+import subprocess
 import threading
 import time
+from array import array
+from collections import deque
+from operator import mul
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    handlers=[
-        logging.FileHandler("/var/log/aios/voice.log"),
-        logging.StreamHandler()
-    ]
-)
+# Shared service modules live one directory up (core/services/aios_common)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aios_common.agent_client import AgentClient
+from aios_common.framed_ipc import _loads
+
+LOG_PATH = "/var/log/aios/voice.log"
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
 logger = logging.getLogger('aios-voice')
 
+def _setup_logging() -> logging.handlers.QueueListener:
+    """Log through a queue so file writes happen off the audio thread"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(LOG_PATH), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    return listener
+
+try:
+    import numpy as np
+    from openwakeword.model import Model as WakeWordModel
+    HAS_OWW = True
+except ImportError:
+    HAS_OWW = False
+
+try:
+    import vosk
+    HAS_VOSK = True
+except ImportError:
+    HAS_VOSK = False
+
+
+# Fenced JSON action blocks in agent replies aren't meant to be spoken
+_JSON_BLOCK = re.compile(r'```json[\s\S]*?```')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _peak(frame: bytes) -> int:
+    """Peak absolute amplitude of a 16-bit mono PCM frame"""
+    samples = array('h', frame)
+    return max(max(samples), -min(samples)) if samples else 0
+
+
+def _rms(pcm: bytes) -> float:
+    """RMS amplitude of 16-bit mono PCM"""
+    samples = array('h', pcm)
+    return math.sqrt(sum(map(mul, samples, samples)) / len(samples)) if samples else 0.0
+
 
 @dataclass
 class VoiceConfig:
     """Voice service configuration"""
     enabled: bool = True
     wake_word: str = "hey ai"
+    # openWakeWord model for the wake word; falls back to matching STT text
+    wakeword_model: str = "/usr/share/aios/wakeword/hey_ai.onnx"
+    wakeword_threshold: float = 0.5
     stt_engine: str = "vosk"  # vosk, google
     tts_engine: str = "espeak"  # espeak, pyttsx3
     sample_rate: int = 16000
     vad_aggressiveness: int = 3  # 0-3
+    # Energy-gated capture (see VoiceService._capture_segment)
+    frame_ms: int = 20
+    preroll_ms: int = 500
+    silence_ms: int = 800
+    min_speech_ms: int = 250
+    max_speech_ms: int = 15000
+    vad_start_factor: float = 2.0  # start threshold = ambient peak x factor
+    vad_min_threshold: int = 500
+    barge_in_factor: float = 2.0  # x start threshold to interrupt TTS
+    rms_gate_factor: float = 1.5  # segments under ambient RMS x factor skip STT
     vosk_model_path: str = "/usr/share/vosk-models/small-en-us"
     
     @classmethod
@@ -45,8 +112,7 @@ class VoiceConfig:
         config_file = Path("/etc/aios/voice.json")
         if config_file.exists():
             try:
-                with open(config_file) as f:
-                    data = json.load(f)
+                data = _loads(config_file.read_bytes())
                 for key, value in data.items():
                     if hasattr(config, key):
                         setattr(config, key, value)
@@ -55,72 +121,174 @@ class VoiceConfig:
         return config
 
 
-class AgentClient:
-    """Client for agent daemon"""
-    
-    SOCKET_PATH = "/run/aios/agent.sock"
-    
-    def chat(self, text: str) -> str:
-        try:
-            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
-                sock.connect(self.SOCKET_PATH)
-                
-                message = json.dumps({'cmd': 'chat', 'text': text})
-                data = message.encode('utf-8')
-                sock.sendall(struct.pack('!I', len(data)))
-                sock.sendall(data)
-                
-                length_data = sock.recv(4)
-                if not length_data:
-                    return "No response from agent"
-                
-                length = struct.unpack('!I', length_data)[0]
-                response_data = sock.recv(length)
-                response = json.loads(response_data.decode('utf-8'))
-                
-                return response.get('response', 'No response')
-        except Exception as e:
-            return f"Error: {e}"
-
-
 class TextToSpeech:
     """Text-to-Speech engine"""
     
+    RATE = 150
+    # Synthesized espeak phrases are replayed from disk, least recently used evicted
+    CACHE_DIR = Path("/var/cache/aios/tts")
+    CACHE_MAX_BYTES = 100 * 1024 * 1024
+    CACHE_MAX_TEXT = 200  # long one-off responses aren't worth caching
+    
     def __init__(self, engine: str = "espeak"):
         self.engine = engine
+        self.speaking = False
+        self._interrupted = False
         self._pyttsx3 = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
         
         if engine == "pyttsx3":
             try:
                 import pyttsx3
                 self._pyttsx3 = pyttsx3.init()
-                self._pyttsx3.setProperty('rate', 150)
+                self._pyttsx3.setProperty('rate', self.RATE)
             except ImportError:
                 self.engine = "espeak"
+        
+        self._player = shutil.which('paplay') or shutil.which('aplay')
+        self._cache_ok = self._player is not None and self._init_cache()
+    
+    def _init_cache(self) -> bool:
+        try:
+            self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            return True
+        except OSError as e:
+            logger.warning(f"TTS cache disabled: {e}")
+            return False
     
     def speak(self, text: str):
         """Speak text"""
         logger.info(f"Speaking: {text[:50]}...")
         
-        if self.engine == "pyttsx3" and self._pyttsx3:
-            self._pyttsx3.say(text)
-            self._pyttsx3.runAndWait()
-        else:
-            # Use espeak
-            import subprocess
+        with self._lock:
+            self.speaking = True
+            try:
+                if self.engine == "pyttsx3" and self._pyttsx3:
+                    self._pyttsx3.say(text)
+                    self._pyttsx3.runAndWait()
+                else:
+                    # Use espeak, replaying a cached rendering when there is one
+                    wav = self._cached_wav(text)
+                    if wav is not None:
+                        self._run([self._player, str(wav)])
+                    else:
+                        self._run(['espeak', '-s', str(self.RATE), text])
+            finally:
+                self.speaking = False
+    
+    def _run(self, cmd):
+        """Run a player/synth process that stop() can terminate"""
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            self._proc.wait()
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+        finally:
+            self._proc = None
+    
+    def _cached_wav(self, text: str) -> Optional[Path]:
+        """Return the cached WAV for text, synthesizing it on a miss"""
+        if not self._cache_ok or len(text) > self.CACHE_MAX_TEXT:
+            return None
+        
+        key = hashlib.sha1(f"{self.engine}|{self.RATE}|{text}".encode()).hexdigest()
+        path = self.CACHE_DIR / f"{key}.wav"
+        try:
+            os.utime(path)  # mtime tracks last use for eviction
+            return path
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"TTS cache error: {e}")
+            return None
+        
+        tmp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        try:
+            subprocess.run(
+                ['espeak', '-s', str(self.RATE), '-w', str(tmp), text],
+                check=True,
+                capture_output=True
+            )
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.error(f"TTS cache error: {e}")
+            return None
+        
+        self._evict()
+        return path
+    
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        try:
+            entries = []
+            with os.scandir(self.CACHE_DIR) as it:
+                for entry in it:
+                    if entry.name.endswith('.wav'):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError as e:
+            logger.debug(f"TTS cache scan failed: {e}")
+            return
+        
+        total = sum(size for _, size, _ in entries)
+        if total <= self.CACHE_MAX_BYTES:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.CACHE_MAX_BYTES:
+                break
             try:
-                subprocess.run(
-                    ['espeak', '-s', '150', text],
-                    check=True,
-                    capture_output=True
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+    
+    def speak_sentences(self, text: str):
+        """Speak text one sentence at a time.
+        
+        Playback starts once the first sentence is ready, and with the
+        cache enabled the next sentence is synthesized while the current
+        one plays. stop() drops whatever is left.
+        """
+        sentences = [part for part in _SENTENCE_END.split(text.strip()) if part]
+        self._interrupted = False
+        prefetch = None
+        
+        for i, sentence in enumerate(sentences):
+            if prefetch is not None:
+                prefetch.join()
+                prefetch = None
+            if self._interrupted:
+                break
+            if self._cache_ok and self.engine != "pyttsx3" and i + 1 < len(sentences):
+                prefetch = threading.Thread(
+                    target=self._cached_wav, args=(sentences[i + 1],), daemon=True
                 )
-            except Exception as e:
-                logger.error(f"TTS error: {e}")
+                prefetch.start()
+            self.speak(sentence)
+    
+    def stop(self):
+        """Cut off the current utterance (barge-in)"""
+        self._interrupted = True
+        if self._pyttsx3:
+            self._pyttsx3.stop()
+        proc = self._proc
+        if proc is not None:
+            proc.terminate()
 
 
 class VoiceService:
     """Main voice service"""
     
+    WAKE_WINDOW_MS = 80  # openWakeWord scores 80 ms of audio per step
+    WAKE_COOLDOWN = 1.0  # seconds to ignore re-triggers after a detection
+    
     def __init__(self, config: VoiceConfig):
         self.config = config
         self.running = False
@@ -128,7 +296,19 @@ class VoiceService:
         self.tts = TextToSpeech(config.tts_engine)
         
         self._recognizer = None
-        self._microphone = None
+        self._pa = None
+        self._stream = None
+        self._frame_samples = 0
+        self._ring: deque = deque()
+        self._start_threshold = 0
+        self._barge_in_threshold = 0
+        self._rms_gate = 0.0
+        self._oww = None
+        self._wake_block_until = 0.0
+        self._vosk_model = None  # loaded once, shared by every recognizer
+        self._kaldi = None  # streaming Vosk recognizer, fed during capture
+        # Commands run off the listen thread so the mic stays armed for barge-in
+        self._commands = ThreadPoolExecutor(max_workers=1, thread_name_prefix='voice-cmd')
         
     def start(self):
         """Start voice service"""
@@ -155,40 +335,208 @@ class VoiceService:
         """Initialize speech recognition"""
         try:
             import speech_recognition as sr
+            import pyaudio
             self._recognizer = sr.Recognizer()
-            self._microphone = sr.Microphone(sample_rate=self.config.sample_rate)
+            
+            # Read fixed-size frames straight from PyAudio
+            self._frame_samples = self.config.sample_rate * self.config.frame_ms // 1000
+            self._pa = pyaudio.PyAudio()
+            self._stream = self._pa.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.config.sample_rate,
+                input=True,
+                frames_per_buffer=self._frame_samples
+            )
+            self._ring = deque(maxlen=max(1, self.config.preroll_ms // self.config.frame_ms))
             
             # Adjust for ambient noise
-            with self._microphone as source:
-                logger.info("Calibrating for ambient noise...")
-                self._recognizer.adjust_for_ambient_noise(source, duration=2)
+            logger.info("Calibrating for ambient noise...")
+            self._calibrate(duration=2)
+            
+            self._init_wakeword()
+            self._init_vosk()
             
             logger.info("Speech recognition initialized")
             return True
             
         except ImportError:
-            logger.error("speech_recognition not available")
+            logger.error("speech_recognition or pyaudio not available")
             return False
         except Exception as e:
             logger.error(f"Failed to init recognition: {e}")
             return False
     
+    def _init_wakeword(self):
+        """Load the keyword spotter so STT only runs on commands"""
+        model = self.config.wakeword_model
+        if not HAS_OWW or not model or not os.path.exists(model):
+            logger.info("Keyword spotter unavailable, matching wake word in STT text")
+            return
+        try:
+            self._oww = WakeWordModel(wakeword_models=[model])
+            logger.info(f"Keyword spotter loaded: {model}")
+        except Exception as e:
+            logger.warning(f"Failed to load wake word model: {e}")
+    
+    def _init_vosk(self):
+        """Load the Vosk model once for streaming recognition"""
+        if self.config.stt_engine != "vosk":
+            return
+        if not HAS_VOSK or not os.path.isdir(self.config.vosk_model_path):
+            logger.warning("Vosk model unavailable, using online recognition")
+            return
+        try:
+            self._vosk_model = vosk.Model(self.config.vosk_model_path)
+            self._kaldi = vosk.KaldiRecognizer(self._vosk_model, self.config.sample_rate)
+        except Exception as e:
+            logger.warning(f"Failed to load Vosk model: {e}")
+    
+    def _calibrate(self, duration: float):
+        """Derive the speech start threshold from the ambient noise level"""
+        frames = max(1, int(duration * 1000) // self.config.frame_ms)
+        ambient = [self._read_frame() for _ in range(frames)]
+        peak = sum(map(_peak, ambient)) / frames
+        self._start_threshold = max(self.config.vad_min_threshold,
+                                    int(peak * self.config.vad_start_factor))
+        self._rms_gate = _rms(b''.join(ambient)) * self.config.rms_gate_factor
+        self._barge_in_threshold = int(self._start_threshold * self.config.barge_in_factor)
+        logger.info(f"Speech start threshold: {self._start_threshold}")
+    
+    def _read_frame(self) -> bytes:
+        return self._stream.read(self._frame_samples, exception_on_overflow=False)
+    
+    def _next_frame(self):
+        """Read a frame and its peak, cutting off TTS if the user talks over it"""
+        frame = self._read_frame()
+        amp = _peak(frame)
+        if self.tts.speaking and amp > self._barge_in_threshold:
+            self.tts.stop()
+        return frame, amp
+    
+    def _drain(self):
+        """Discard buffered audio, e.g. our own TTS prompt"""
+        available = self._stream.get_read_available()
+        if available:
+            self._stream.read(available, exception_on_overflow=False)
+        self._ring.clear()
+    
+    def _capture_segment(self, timeout: Optional[float] = None, rec=None) -> Optional[bytes]:
+        """Capture one utterance with an energy-gated state machine.
+        
+        While IDLE the last preroll_ms of frames are kept in a ring buffer.
+        A frame above the start threshold switches to RECORDING, which ends
+        after silence_ms of quiet; the pre-roll is prepended so word onsets
+        aren't clipped. Segments with under min_speech_ms of speech, or
+        whose RMS stays near the ambient level (a door, a chair scrape), are
+        dropped. Returns None if no speech starts within ``timeout`` seconds.
+        
+        If ``rec`` is given, every recorded frame is fed to it as it arrives
+        so decoding overlaps the speech instead of following it.
+        """
+        frame_ms = self.config.frame_ms
+        silence_frames = self.config.silence_ms // frame_ms
+        min_frames = self.config.min_speech_ms // frame_ms
+        max_frames = self.config.max_speech_ms // frame_ms
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ring = self._ring
+        segment = None
+        preroll = quiet = 0
+        
+        while self.running:
+            frame, amp = self._next_frame()
+            
+            if segment is None:
+                # IDLE
+                if amp > self._start_threshold:
+                    segment = list(ring)
+                    preroll = len(segment)
+                    segment.append(frame)
+                    quiet = 0
+                    ring.clear()
+                    if rec is not None:
+                        rec.AcceptWaveform(b''.join(segment))
+                else:
+                    ring.append(frame)
+                    if deadline is not None and time.monotonic() > deadline:
+                        return None
+                continue
+            
+            # RECORDING
+            segment.append(frame)
+            if rec is not None:
+                rec.AcceptWaveform(frame)
+            quiet = quiet + 1 if amp <= self._start_threshold else 0
+            recorded = len(segment) - preroll
+            if quiet >= silence_frames or recorded >= max_frames:
+                if (recorded - quiet >= min_frames
+                        and _rms(b''.join(segment[preroll:])) >= self._rms_gate):
+                    return b''.join(segment)
+                segment = None
+                if rec is not None:
+                    rec.Reset()
+        
+        return None
+    
+    def _wait_for_wake(self) -> bool:
+        """Score sliding 80 ms windows with the keyword spotter until it fires"""
+        per_window = max(1, self.WAKE_WINDOW_MS // self.config.frame_ms)
+        window = []
+        
+        while self.running:
+            frame, _ = self._next_frame()
+            window.append(frame)
+            if len(window) < per_window:
+                continue
+            
+            scores = self._oww.predict(np.frombuffer(b''.join(window), dtype=np.int16))
+            window.clear()
+            if time.monotonic() < self._wake_block_until:
+                continue
+            if max(scores.values(), default=0) > self.config.wakeword_threshold:
+                self._wake_block_until = time.monotonic() + self.WAKE_COOLDOWN
+                self._oww.reset()
+                return True
+        
+        return False
+    
+    def _transcribe_next(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Capture the next utterance and transcribe it.
+        
+        Returns None if nothing was said before ``timeout`` and an empty
+        string if speech was captured but not understood.
+        """
+        if self._kaldi is not None:
+            if self._capture_segment(timeout, self._kaldi) is None:
+                return None
+            # Audio was decoded during capture; this only flushes the tail
+            return _loads(self._kaldi.FinalResult()).get('text', '')
+        
+        segment = self._capture_segment(timeout)
+        if segment is None:
+            return None
+        return self._recognize(self._audio_data(segment)) or ''
+    
+    def _audio_data(self, segment: bytes):
+        """Wrap captured PCM for the speech_recognition backends"""
+        import speech_recognition as sr
+        return sr.AudioData(segment, self.config.sample_rate, 2)
+    
     def _listen_loop(self):
         """Main listening loop"""
-        import speech_recognition as sr
-        
         logger.info("Listening for wake word...")
         
         while self.running:
             try:
-                with self._microphone as source:
-                    try:
-                        audio = self._recognizer.listen(source, timeout=5)
-                    except sr.WaitTimeoutError:
-                        continue
+                if self._oww is not None:
+                    # Keyword spotter gates STT; only the command is transcribed
+                    if self._wait_for_wake():
+                        logger.info("Wake word detected")
+                        self._listen_for_command()
+                    continue
                 
                 # Recognize speech
-                text = self._recognize(audio)
+                text = self._transcribe_next()
                 if not text:
                     continue
                 
@@ -202,19 +550,12 @@ class VoiceService:
                     command = text[idx + len(self.config.wake_word):].strip()
                     
                     if command:
-                        self._process_command(command)
+                        self._commands.submit(self._process_command, command)
                     else:
                         # Wait for command
                         self.tts.speak("Yes?")
-                        
-                        with self._microphone as source:
-                            try:
-                                audio = self._recognizer.listen(source, timeout=5)
-                                command = self._recognize(audio)
-                                if command:
-                                    self._process_command(command)
-                            except sr.WaitTimeoutError:
-                                self.tts.speak("I didn't hear anything.")
+                        self._drain()
+                        self._listen_for_command()
                 
             except KeyboardInterrupt:
                 break
@@ -222,21 +563,27 @@ class VoiceService:
                 logger.error(f"Listening error: {e}")
                 time.sleep(1)
     
+    def _listen_for_command(self):
+        """Capture and run the command that follows the wake word"""
+        command = self._transcribe_next(timeout=5)
+        if command is None:
+            self.tts.speak("I didn't hear anything.")
+            return
+        if command:
+            self._commands.submit(self._process_command, command)
+    
     def _recognize(self, audio) -> Optional[str]:
-        """Recognize speech from audio"""
+        """Recognize a complete AudioData clip"""
         import speech_recognition as sr
         
+        if self._vosk_model is not None:
+            # Reuse the preloaded model; recognize_vosk would load it per call
+            rec = vosk.KaldiRecognizer(self._vosk_model, self.config.sample_rate)
+            rec.AcceptWaveform(audio.get_raw_data(convert_rate=self.config.sample_rate,
+                                                  convert_width=2))
+            return _loads(rec.FinalResult()).get('text') or None
+        
         try:
-            if self.config.stt_engine == "vosk":
-                # Try Vosk
-                try:
-                    return self._recognizer.recognize_vosk(
-                        audio,
-                        model_path=self.config.vosk_model_path
-                    )
-                except:
-                    pass
-            
             # Try Google
             return self._recognizer.recognize_google(audio)
             
@@ -255,17 +602,19 @@ class VoiceService:
         
         try:
             # Send to agent
-            response = self.agent.chat(command)
+            reply = self.agent.chat(command)
+            if reply.get('status') == 'error':
+                response = f"Error: {reply.get('message')}"
+            else:
+                response = reply.get('response', 'No response')
             
             # Extract text response (remove JSON if present)
-            import re
-            response_text = re.sub(r'```json[\s\S]*?```', '', response).strip()
+            if '```json' in response:
+                response = _JSON_BLOCK.sub('', response)
+            response_text = response.strip()
+            
+            self.tts.speak_sentences(response_text or "Done.")
             
-            if response_text:
-                self.tts.speak(response_text)
-            else:
-                self.tts.speak("Done.")
-                
         except Exception as e:
             logger.error(f"Command processing error: {e}")
             self.tts.speak("Sorry, I encountered an error.")
@@ -273,24 +622,40 @@ class VoiceService:
     def stop(self):
         """Stop voice service"""
         self.running = False
+        self.tts.stop()
+        self._commands.shutdown(wait=False, cancel_futures=True)
+        self.agent.close()
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
         logger.info("Voice service stopped")
 
 
 def main():
     """Main entry point"""
-    os.makedirs("/var/log/aios", exist_ok=True)
+    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    listener = _setup_logging()
     
     config = VoiceConfig.load()
     service = VoiceService(config)
     
     def signal_handler(sig, frame):
         service.stop()
+        # The finally below stops the listener, flushing queued records;
+        # QueueListener.stop() is not idempotent
         sys.exit(0)
     
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
-    service.start()
+    try:
+        service.start()
+    finally:
+        listener.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,3 @@
+"""
+AI-OS shared service modules.
+"""
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+AI-OS Agent Client
+Blocking framed client for the agent daemon shared by the UI and voice services.
+"""
+
+import logging
+import socket
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .framed_ipc import HAS_MSGPACK, LEN_HDR, _dumps, _loads
+
+if HAS_MSGPACK:
+    from .framed_ipc import _msgpack_decode, _msgpack_encode
+
+logger = logging.getLogger('aios-agent-client')
+
+
+class _StaleConnection(ConnectionError):
+    """The agent closed the connection before any of the reply arrived"""
+
+
+def _decode_json(data) -> Any:
+    # The stdlib json fallback doesn't accept a memoryview
+    return _loads(bytes(data))
+
+
+# (encode, decode) for the most compact encoding the agent understands:
+# MessagePack when msgspec is available, JSON otherwise
+AGENT_CODEC = (_msgpack_encode, _msgpack_decode) if HAS_MSGPACK else (_dumps, _decode_json)
+
+
+class AgentClient:
+    """Client for the AI-OS Agent daemon
+
+    Keeps one connection open across calls and reconnects when the agent
+    has dropped it. Requests are JSON unless ``encode``/``decode`` say
+    otherwise; ``decode`` is handed a memoryview that is only valid until
+    the next request.
+    """
+
+    SOCKET_PATH = "/run/aios/agent.sock"
+    RECV_BUF_SIZE = 65536
+
+    def __init__(self, socket_path: str = SOCKET_PATH,
+                 encode: Callable[[Any], bytes] = _dumps,
+                 decode: Callable[[Any], Any] = _decode_json,
+                 sock_buf_size: Optional[int] = None):
+        self.socket_path = socket_path
+        self._encode = encode
+        self._decode = decode
+        self._sock_buf_size = sock_buf_size
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        # Reused for every reply; grown when a reply doesn't fit
+        self._recvbuf = bytearray(self.RECV_BUF_SIZE)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self._sock_buf_size:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._sock_buf_size)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._sock_buf_size)
+        sock.connect(self.socket_path)
+        self._sock = sock
+
+    def _recv_exact(self, n: int, first: bool = False) -> memoryview:
+        """Read exactly n bytes into the receive buffer.
+
+        A bare recv(n) can return a short read. The returned view is only
+        valid until the next read. ``first`` marks the start of a reply, where
+        end of stream before any byte means the connection had gone stale.
+        """
+        if n > len(self._recvbuf):
+            self._recvbuf = bytearray(n)
+        view = memoryview(self._recvbuf)[:n]
+        off = 0
+        while off < n:
+            got = self._sock.recv_into(view[off:])
+            if not got:
+                if first and off == 0:
+                    raise _StaleConnection("Connection closed by agent")
+                raise ConnectionError("Connection closed by agent")
+            off += got
+        return view
+
+    def _request(self, data: bytes) -> memoryview:
+        header = LEN_HDR.pack(len(data))
+        try:
+            # Length prefix and payload in one vectored send
+            sent = self._sock.sendmsg([header, data])
+            if sent < len(header) + len(data):
+                self._sock.sendall((header + data)[sent:])
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise _StaleConnection(str(e)) from e
+        length, = LEN_HDR.unpack(self._recv_exact(LEN_HDR.size, first=True))
+        return self._recv_exact(length)
+
+    def send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request to the agent and return its reply"""
+        with self._lock:
+            try:
+                data = self._encode(message)
+                if self._sock is None:
+                    self._connect()
+                    response_data = self._request(data)
+                else:
+                    try:
+                        response_data = self._request(data)
+                    except _StaleConnection:
+                        # The agent dropped our idle connection; retry once.
+                        # Failures after part of the reply arrived are not
+                        # retried, since the request may already have run
+                        self.close()
+                        self._connect()
+                        response_data = self._request(data)
+                return self._decode(response_data)
+            except Exception as e:
+                self.close()
+                logger.error(f"Agent error: {e}")
+                return {'status': 'error', 'message': str(e)}
+
+    def chat(self, text: str) -> Dict[str, Any]:
+        return self.send({'cmd': 'chat', 'text': text})
+
+    def status(self) -> Dict[str, Any]:
+        return self.send({'cmd': 'status'})
+
+    def action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        return self.send({'cmd': 'action', 'action': action})
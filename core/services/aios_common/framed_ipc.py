@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+AI-OS Framed IPC
+Length-prefixed JSON request/response loop shared by the service daemons.
+"""
+
+import asyncio
+import json
+import logging
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+logger = logging.getLogger('aios-ipc')
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+# MessagePack is the compact alternative to JSON on the agent socket. JSON
+# frames always open with '{', and the agent answers in the request's encoding
+try:
+    import msgspec
+    _msgpack_encode = msgspec.msgpack.Encoder().encode
+    _msgpack_decode = msgspec.msgpack.Decoder().decode
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+# Every frame is a 4-byte big-endian length followed by the JSON payload
+LEN_HDR = struct.Struct('!I')
+
+
+class FramedJsonServer(ABC):
+    """Serves framed JSON requests on an asyncio stream connection.
+
+    Subclasses implement ``_process_request``. They can override
+    ``_decode_request`` and ``REQUEST_ERRORS`` to parse frames into typed
+    requests instead of dicts.
+    """
+
+    # Decode failures that get an error response instead of dropping the client
+    REQUEST_ERRORS: tuple = (ValueError,)
+
+    def _decode_request(self, data: bytes) -> Any:
+        """Parse one request frame"""
+        return _loads(data)
+
+    @abstractmethod
+    async def _process_request(self, request: Any) -> Dict[str, Any]:
+        """Handle one decoded request and return the response"""
+
+    async def _handle_client(self, reader, writer):
+        """Handle IPC client"""
+        try:
+            while True:
+                try:
+                    length, = LEN_HDR.unpack(await reader.readexactly(LEN_HDR.size))
+                    data = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    request = self._decode_request(data)
+                except self.REQUEST_ERRORS as e:
+                    response = {'status': 'error', 'message': str(e)}
+                else:
+                    try:
+                        response = await self._process_request(request)
+                    except Exception as e:
+                        # A bad request must not cost the client its connection
+                        logger.exception("Request failed")
+                        response = {'status': 'error', 'message': str(e)}
+
+                response_data = _dumps(response)
+                # Header and payload in one write so the response goes out in one send
+                writer.write(LEN_HDR.pack(len(response_data)) + response_data)
+                await writer.drain()
+
+        except Exception as e:
+            logger.error(f"Client error: {e}")
+        finally:
+            writer.close()
+            await writer.wait_closed()
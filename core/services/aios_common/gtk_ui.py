@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+AI-OS GTK helpers
+Stylesheet and clock helpers shared by the GTK shell and the fallback UI.
+GTK is only imported when a window uses them.
+"""
+
+import glob
+import os
+import time
+
+
+def software_rendering() -> bool:
+    """Best guess whether GTK will draw without GPU acceleration"""
+    renderer = os.environ.get('GSK_RENDERER')
+    if renderer:
+        return renderer == 'cairo'
+    if os.environ.get('LIBGL_ALWAYS_SOFTWARE'):
+        return True
+    try:
+        return not glob.glob('/dev/dri/renderD*')
+    except OSError:
+        return False
+
+
+class GtkWindowMixin:
+    """Mixin for GTK windows with a shared stylesheet and a per-second clock
+
+    Subclasses implement ``_update_clock``; ``_schedule_tick`` starts it.
+    """
+
+    # One provider for the display, shared by every window of the class
+    _css_provider = None
+    _css_data = None
+
+    @classmethod
+    def ensure_css(cls, data: bytes):
+        """Install the stylesheet provider once; later calls only reload changed CSS"""
+        from gi.repository import Gdk, Gtk
+
+        if cls._css_provider is None:
+            cls._css_provider = Gtk.CssProvider()
+            Gtk.StyleContext.add_provider_for_display(
+                Gdk.Display.get_default(),
+                cls._css_provider,
+                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+            )
+        if data != cls._css_data:
+            cls._css_data = data
+            cls._css_provider.load_from_data(data)
+
+    def _schedule_tick(self):
+        """Arm the next clock update just after the wall-clock second turns over"""
+        from gi.repository import GLib
+
+        ms = 1000 - int(time.time() * 1000) % 1000
+        GLib.timeout_add(ms, self._tick)
+
+    def _tick(self):
+        self._update_clock()
+        self._schedule_tick()
+        return False
+
+    def _update_clock(self):
+        raise NotImplementedError
@@ -6,14 +6,45 @@ Visual customization and theme management.
 
 import os
 import json
+import subprocess
 from pathlib import Path
+from functools import lru_cache
 from dataclasses import dataclass, field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 from enum import Enum
 import logging
 
 logger = logging.getLogger('aios-theme')
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+try:
+    from gi.repository import Gio
+    HAS_GIO = True
+except ImportError:
+    HAS_GIO = False
+
+BACKGROUND_SCHEMA = 'org.gnome.desktop.background'
+
+
+def _write_atomic(path: Path, text: str):
+    """Write a file via a temp file and rename so readers never see a partial write"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
 
 class ColorScheme(Enum):
     DARK = "dark"
@@ -21,70 +52,70 @@ class ColorScheme(Enum):
     AUTO = "auto"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Color:
-    """RGBA color"""
+    """RGBA color (immutable, so the hex form is computed once)"""
     r: int
     g: int
     b: int
     a: float = 1.0
+    _hex: str = field(default='', init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, '_hex', '#' + bytes((self.r, self.g, self.b)).hex())
     
     def to_hex(self) -> str:
-        return f"#{self.r:02x}{self.g:02x}{self.b:02x}"
+        return self._hex
     
     def to_rgba(self) -> str:
         return f"rgba({self.r}, {self.g}, {self.b}, {self.a})"
     
     @classmethod
+    @lru_cache(maxsize=1024)
     def from_hex(cls, hex_str: str) -> 'Color':
-        hex_str = hex_str.lstrip('#')
-        if len(hex_str) == 6:
-            return cls(
-                r=int(hex_str[0:2], 16),
-                g=int(hex_str[2:4], 16),
-                b=int(hex_str[4:6], 16)
-            )
-        elif len(hex_str) == 8:
-            return cls(
-                r=int(hex_str[0:2], 16),
-                g=int(hex_str[2:4], 16),
-                b=int(hex_str[4:6], 16),
-                a=int(hex_str[6:8], 16) / 255
-            )
+        # Colors are immutable, so theme files that repeat a value share one instance
+        try:
+            raw = bytes.fromhex(hex_str.lstrip('#'))
+        except ValueError:
+            raw = b''
+        if len(raw) == 3:
+            return cls(raw[0], raw[1], raw[2])
+        elif len(raw) == 4:
+            return cls(raw[0], raw[1], raw[2], raw[3] / 255)
         raise ValueError(f"Invalid hex color: {hex_str}")
 
 
-@dataclass
+@dataclass(slots=True)
 class ThemeColors:
-    """Theme color palette"""
+    """Theme color palette (Colors are frozen, so defaults are shared between palettes)"""
     # Background colors
-    background: Color = field(default_factory=lambda: Color(26, 26, 46))
-    surface: Color = field(default_factory=lambda: Color(22, 33, 62))
-    surface_variant: Color = field(default_factory=lambda: Color(42, 53, 82))
+    background: Color = Color(26, 26, 46)
+    surface: Color = Color(22, 33, 62)
+    surface_variant: Color = Color(42, 53, 82)
     
     # Text colors
-    text_primary: Color = field(default_factory=lambda: Color(255, 255, 255))
-    text_secondary: Color = field(default_factory=lambda: Color(180, 180, 200))
-    text_disabled: Color = field(default_factory=lambda: Color(100, 100, 120))
+    text_primary: Color = Color(255, 255, 255)
+    text_secondary: Color = Color(180, 180, 200)
+    text_disabled: Color = Color(100, 100, 120)
     
     # Accent colors
-    primary: Color = field(default_factory=lambda: Color(102, 126, 234))
-    primary_variant: Color = field(default_factory=lambda: Color(118, 75, 162))
-    secondary: Color = field(default_factory=lambda: Color(3, 218, 197))
+    primary: Color = Color(102, 126, 234)
+    primary_variant: Color = Color(118, 75, 162)
+    secondary: Color = Color(3, 218, 197)
     
     # Status colors
-    success: Color = field(default_factory=lambda: Color(76, 175, 80))
-    warning: Color = field(default_factory=lambda: Color(255, 193, 7))
-    error: Color = field(default_factory=lambda: Color(244, 67, 54))
-    info: Color = field(default_factory=lambda: Color(33, 150, 243))
+    success: Color = Color(76, 175, 80)
+    warning: Color = Color(255, 193, 7)
+    error: Color = Color(244, 67, 54)
+    info: Color = Color(33, 150, 243)
     
     # UI colors
-    border: Color = field(default_factory=lambda: Color(60, 70, 100))
-    divider: Color = field(default_factory=lambda: Color(50, 60, 80))
-    shadow: Color = field(default_factory=lambda: Color(0, 0, 0, 0.3))
+    border: Color = Color(60, 70, 100)
+    divider: Color = Color(50, 60, 80)
+    shadow: Color = Color(0, 0, 0, 0.3)
 
 
-@dataclass
+@dataclass(slots=True)
 class ThemeTypography:
     """Theme typography settings"""
     font_family: str = "Inter, system-ui, sans-serif"
@@ -106,7 +137,7 @@ class ThemeTypography:
     weight_bold: int = 700
 
 
-@dataclass
+@dataclass(slots=True)
 class ThemeSpacing:
     """Theme spacing values"""
     xs: int = 4
@@ -117,7 +148,7 @@ class ThemeSpacing:
     xxl: int = 48
 
 
-@dataclass
+@dataclass(slots=True)
 class ThemeEffects:
     """Theme visual effects"""
     border_radius_sm: int = 4
@@ -135,63 +166,19 @@ class ThemeEffects:
     animation_slow: str = "400ms ease"
 
 
-@dataclass
-class Theme:
-    """Complete theme definition"""
-    id: str
-    name: str
-    author: str = ""
-    version: str = "1.0.0"
-    scheme: ColorScheme = ColorScheme.DARK
-    
-    colors: ThemeColors = field(default_factory=ThemeColors)
-    typography: ThemeTypography = field(default_factory=ThemeTypography)
-    spacing: ThemeSpacing = field(default_factory=ThemeSpacing)
-    effects: ThemeEffects = field(default_factory=ThemeEffects)
-    
-    # Wallpaper
-    wallpaper: str = ""
-    
-    # Custom CSS
-    custom_css: str = ""
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert theme to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'author': self.author,
-            'version': self.version,
-            'scheme': self.scheme.value,
-            'colors': {
-                'background': self.colors.background.to_hex(),
-                'surface': self.colors.surface.to_hex(),
-                'primary': self.colors.primary.to_hex(),
-                'secondary': self.colors.secondary.to_hex(),
-                'text_primary': self.colors.text_primary.to_hex(),
-                'text_secondary': self.colors.text_secondary.to_hex(),
-                'success': self.colors.success.to_hex(),
-                'warning': self.colors.warning.to_hex(),
-                'error': self.colors.error.to_hex(),
-            },
-            'wallpaper': self.wallpaper,
-            'custom_css': self.custom_css
-        }
-    
-    def to_gtk_css(self) -> str:
-        """Generate GTK CSS"""
-        return f"""
-/* AI-OS Theme: {self.name} */
+# CSS templates rendered with str.format_map(Theme._css_vars())
+_GTK_CSS_TEMPLATE = """
+/* AI-OS Theme: {name} */
 
-@define-color bg_color {self.colors.background.to_hex()};
-@define-color fg_color {self.colors.text_primary.to_hex()};
-@define-color accent_color {self.colors.primary.to_hex()};
-@define-color accent_bg_color {self.colors.primary.to_hex()};
+@define-color bg_color {background};
+@define-color fg_color {text_primary};
+@define-color accent_color {primary};
+@define-color accent_bg_color {primary};
 @define-color accent_fg_color white;
-@define-color success_color {self.colors.success.to_hex()};
-@define-color warning_color {self.colors.warning.to_hex()};
-@define-color error_color {self.colors.error.to_hex()};
-@define-color border_color {self.colors.border.to_hex()};
+@define-color success_color {success};
+@define-color warning_color {warning};
+@define-color error_color {error};
+@define-color border_color {border};
 
 window {{
     background-color: @bg_color;
@@ -203,15 +190,15 @@ window {{
 }}
 
 button {{
-    background: {self.colors.surface.to_hex()};
+    background: {surface};
     border: 1px solid @border_color;
-    border-radius: {self.effects.border_radius_md}px;
-    padding: {self.spacing.sm}px {self.spacing.md}px;
-    transition: {self.effects.animation_fast};
+    border-radius: {radius_md}px;
+    padding: {spacing_sm}px {spacing_md}px;
+    transition: {animation_fast};
 }}
 
 button:hover {{
-    background: {self.colors.surface_variant.to_hex()};
+    background: {surface_variant};
 }}
 
 button.suggested-action {{
@@ -220,10 +207,10 @@ button.suggested-action {{
 }}
 
 entry {{
-    background: {self.colors.surface.to_hex()};
+    background: {surface};
     border: 1px solid @border_color;
-    border-radius: {self.effects.border_radius_md}px;
-    padding: {self.spacing.sm}px {self.spacing.md}px;
+    border-radius: {radius_md}px;
+    padding: {spacing_sm}px {spacing_md}px;
 }}
 
 entry:focus {{
@@ -231,9 +218,9 @@ entry:focus {{
 }}
 
 .card {{
-    background: {self.colors.surface.to_hex()};
-    border-radius: {self.effects.border_radius_lg}px;
-    padding: {self.spacing.md}px;
+    background: {surface};
+    border-radius: {radius_lg}px;
+    padding: {spacing_md}px;
 }}
 
 scrollbar {{
@@ -241,34 +228,32 @@ scrollbar {{
 }}
 
 scrollbar slider {{
-    background: {self.colors.border.to_hex()};
-    border-radius: {self.effects.border_radius_full}px;
+    background: {border};
+    border-radius: {radius_full}px;
     min-width: 6px;
     min-height: 6px;
 }}
 
-{self.custom_css}
+{custom_css}
 """
-    
-    def to_shell_css(self) -> str:
-        """Generate CSS for AI-OS shell"""
-        return f"""
+
+_SHELL_CSS_TEMPLATE = """
 :root {{
-    --bg: {self.colors.background.to_hex()};
-    --surface: {self.colors.surface.to_hex()};
-    --primary: {self.colors.primary.to_hex()};
-    --secondary: {self.colors.secondary.to_hex()};
-    --text: {self.colors.text_primary.to_hex()};
-    --text-secondary: {self.colors.text_secondary.to_hex()};
-    --border: {self.colors.border.to_hex()};
-    --success: {self.colors.success.to_hex()};
-    --warning: {self.colors.warning.to_hex()};
-    --error: {self.colors.error.to_hex()};
-    --radius-sm: {self.effects.border_radius_sm}px;
-    --radius-md: {self.effects.border_radius_md}px;
-    --radius-lg: {self.effects.border_radius_lg}px;
-    --font: {self.typography.font_family};
-    --font-mono: {self.typography.font_family_mono};
+    --bg: {background};
+    --surface: {surface};
+    --primary: {primary};
+    --secondary: {secondary};
+    --text: {text_primary};
+    --text-secondary: {text_secondary};
+    --border: {border};
+    --success: {success};
+    --warning: {warning};
+    --error: {error};
+    --radius-sm: {radius_sm}px;
+    --radius-md: {radius_md}px;
+    --radius-lg: {radius_lg}px;
+    --font: {font};
+    --font-mono: {font_mono};
 }}
 
 body {{
@@ -279,15 +264,117 @@ body {{
 """
 
 
-# Built-in themes
-THEMES = {
-    'aios-dark': Theme(
+@dataclass(slots=True)
+class Theme:
+    """Complete theme definition"""
+    id: str
+    name: str
+    author: str = ""
+    version: str = "1.0.0"
+    scheme: ColorScheme = ColorScheme.DARK
+    
+    colors: ThemeColors = field(default_factory=ThemeColors)
+    typography: ThemeTypography = field(default_factory=ThemeTypography)
+    spacing: ThemeSpacing = field(default_factory=ThemeSpacing)
+    effects: ThemeEffects = field(default_factory=ThemeEffects)
+    
+    # Wallpaper
+    wallpaper: str = ""
+    
+    # Custom CSS
+    custom_css: str = ""
+    
+    # Rendered CSS, reset whenever a field is reassigned
+    _gtk_css_cache: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _shell_css_cache: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        if not name.startswith('_'):
+            object.__setattr__(self, '_gtk_css_cache', None)
+            object.__setattr__(self, '_shell_css_cache', None)
+        object.__setattr__(self, name, value)
+    
+    def invalidate_css(self):
+        """Drop rendered CSS after mutating nested colors/typography in place"""
+        self._gtk_css_cache = None
+        self._shell_css_cache = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert theme to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'author': self.author,
+            'version': self.version,
+            'scheme': self.scheme.value,
+            'colors': {
+                'background': self.colors.background.to_hex(),
+                'surface': self.colors.surface.to_hex(),
+                'primary': self.colors.primary.to_hex(),
+                'secondary': self.colors.secondary.to_hex(),
+                'text_primary': self.colors.text_primary.to_hex(),
+                'text_secondary': self.colors.text_secondary.to_hex(),
+                'success': self.colors.success.to_hex(),
+                'warning': self.colors.warning.to_hex(),
+                'error': self.colors.error.to_hex(),
+            },
+            'wallpaper': self.wallpaper,
+            'custom_css': self.custom_css
+        }
+    
+    def _css_vars(self) -> Dict[str, Any]:
+        """Values substituted into the CSS templates"""
+        colors = self.colors
+        effects = self.effects
+        return {
+            'name': self.name,
+            'background': colors.background.to_hex(),
+            'surface': colors.surface.to_hex(),
+            'surface_variant': colors.surface_variant.to_hex(),
+            'text_primary': colors.text_primary.to_hex(),
+            'text_secondary': colors.text_secondary.to_hex(),
+            'primary': colors.primary.to_hex(),
+            'secondary': colors.secondary.to_hex(),
+            'success': colors.success.to_hex(),
+            'warning': colors.warning.to_hex(),
+            'error': colors.error.to_hex(),
+            'border': colors.border.to_hex(),
+            'radius_sm': effects.border_radius_sm,
+            'radius_md': effects.border_radius_md,
+            'radius_lg': effects.border_radius_lg,
+            'radius_full': effects.border_radius_full,
+            'spacing_sm': self.spacing.sm,
+            'spacing_md': self.spacing.md,
+            'animation_fast': effects.animation_fast,
+            'font': self.typography.font_family,
+            'font_mono': self.typography.font_family_mono,
+            'custom_css': self.custom_css,
+        }
+    
+    def to_gtk_css(self) -> str:
+        """Generate GTK CSS"""
+        if self._gtk_css_cache is not None:
+            return self._gtk_css_cache
+        self._gtk_css_cache = _GTK_CSS_TEMPLATE.format_map(self._css_vars())
+        return self._gtk_css_cache
+    
+    def to_shell_css(self) -> str:
+        """Generate CSS for AI-OS shell"""
+        if self._shell_css_cache is not None:
+            return self._shell_css_cache
+        self._shell_css_cache = _SHELL_CSS_TEMPLATE.format_map(self._css_vars())
+        return self._shell_css_cache
+
+
+# Built-in themes, constructed on first use
+_THEME_BUILDERS: Dict[str, Callable[[], Theme]] = {
+    'aios-dark': lambda: Theme(
         id='aios-dark',
         name='AI-OS Dark',
         author='AI-OS Team',
         scheme=ColorScheme.DARK
     ),
-    'aios-light': Theme(
+    'aios-light': lambda: Theme(
         id='aios-light',
         name='AI-OS Light',
         author='AI-OS Team',
@@ -302,7 +389,7 @@ THEMES = {
             border=Color(200, 200, 220)
         )
     ),
-    'midnight': Theme(
+    'midnight': lambda: Theme(
         id='midnight',
         name='Midnight',
         author='AI-OS Team',
@@ -314,7 +401,7 @@ THEMES = {
             secondary=Color(255, 100, 150)
         )
     ),
-    'forest': Theme(
+    'forest': lambda: Theme(
         id='forest',
         name='Forest',
         author='AI-OS Team',
@@ -329,19 +416,52 @@ THEMES = {
 }
 
 
+_builtin_themes: Dict[str, Theme] = {}
+
+
+def _get_builtin(theme_id: str) -> Theme:
+    """Build a built-in theme the first time it is asked for"""
+    theme = _builtin_themes.get(theme_id)
+    if theme is None:
+        theme = _builtin_themes[theme_id] = _THEME_BUILDERS[theme_id]()
+    return theme
+
+
+def __getattr__(name: str):
+    # THEMES stays importable; accessing it builds every built-in theme
+    if name == 'THEMES':
+        return {theme_id: _get_builtin(theme_id) for theme_id in _THEME_BUILDERS}
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class ThemeManager:
     """Theme manager for AI-OS"""
     
     THEMES_DIR = Path("/usr/share/aios/themes")
     USER_THEMES_DIR = Path.home() / ".local/share/aios/themes"
     CONFIG_PATH = Path("/etc/aios/theme.json")
+    GTK_CSS_PATH = Path.home() / ".config/gtk-4.0/gtk.css"
+    SHELL_CSS_PATH = Path.home() / ".config/aios/shell.css"
     
     def __init__(self):
-        self.themes: Dict[str, Theme] = THEMES.copy()
+        # User-installed themes; built-ins are looked up through _get_builtin
+        self.themes: Dict[str, Theme] = {}
         self.current_theme_id: str = 'aios-dark'
+        self._bg_settings = self._open_settings(BACKGROUND_SCHEMA)
         self._load_user_themes()
         self._load_config()
     
+    @staticmethod
+    def _open_settings(schema_id: str):
+        """Open a GSettings schema in-process, or None if it isn't installed"""
+        if not HAS_GIO:
+            return None
+        # Gio.Settings.new() aborts the process on an unknown schema, so check first
+        source = Gio.SettingsSchemaSource.get_default()
+        if source is None or source.lookup(schema_id, True) is None:
+            return None
+        return Gio.Settings.new(schema_id)
+    
     def _load_user_themes(self):
         """Load user-installed themes"""
         for themes_dir in [self.THEMES_DIR, self.USER_THEMES_DIR]:
@@ -350,8 +470,7 @@ class ThemeManager:
             
             for theme_file in themes_dir.glob("*.json"):
                 try:
-                    with open(theme_file) as f:
-                        data = json.load(f)
+                    data = _loads(theme_file.read_bytes())
                     theme = self._parse_theme(data)
                     self.themes[theme.id] = theme
                 except Exception as e:
@@ -380,8 +499,7 @@ class ThemeManager:
         """Load theme configuration"""
         if self.CONFIG_PATH.exists():
             try:
-                with open(self.CONFIG_PATH) as f:
-                    data = json.load(f)
+                data = _loads(self.CONFIG_PATH.read_bytes())
                 self.current_theme_id = data.get('theme', 'aios-dark')
             except Exception as e:
                 logger.warning(f"Failed to load theme config: {e}")
@@ -390,25 +508,33 @@ class ThemeManager:
         """Save theme configuration"""
         try:
             self.CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.CONFIG_PATH, 'w') as f:
-                json.dump({'theme': self.current_theme_id}, f)
+            self.CONFIG_PATH.write_bytes(_dumps({'theme': self.current_theme_id}))
         except Exception as e:
             logger.error(f"Failed to save theme config: {e}")
     
+    def get_theme(self, theme_id: str) -> Optional[Theme]:
+        """Look up a theme; user themes override built-ins with the same id"""
+        theme = self.themes.get(theme_id)
+        if theme is None and theme_id in _THEME_BUILDERS:
+            theme = _get_builtin(theme_id)
+        return theme
+    
     def get_available_themes(self) -> List[Dict[str, str]]:
         """Get list of available themes"""
+        ids = list(_THEME_BUILDERS)
+        ids += [theme_id for theme_id in self.themes if theme_id not in _THEME_BUILDERS]
         return [
             {'id': t.id, 'name': t.name, 'author': t.author, 'scheme': t.scheme.value}
-            for t in self.themes.values()
+            for t in map(self.get_theme, ids)
         ]
     
     def get_current_theme(self) -> Theme:
         """Get current theme"""
-        return self.themes.get(self.current_theme_id, THEMES['aios-dark'])
+        return self.get_theme(self.current_theme_id) or _get_builtin('aios-dark')
     
     def set_theme(self, theme_id: str) -> bool:
         """Set current theme"""
-        if theme_id not in self.themes:
+        if self.get_theme(theme_id) is None:
             return False
         
         self.current_theme_id = theme_id
@@ -420,20 +546,41 @@ class ThemeManager:
         """Apply current theme to system"""
         theme = self.get_current_theme()
         
-        # Write GTK CSS
-        gtk_css_path = Path.home() / ".config/gtk-4.0/gtk.css"
+        # Write GTK and shell CSS; the rename gives file monitors one change event
         try:
-            gtk_css_path.parent.mkdir(parents=True, exist_ok=True)
-            gtk_css_path.write_text(theme.to_gtk_css())
+            _write_atomic(self.GTK_CSS_PATH, theme.to_gtk_css())
         except Exception as e:
             logger.warning(f"Failed to write GTK CSS: {e}")
         
+        try:
+            _write_atomic(self.SHELL_CSS_PATH, theme.to_shell_css())
+        except Exception as e:
+            logger.warning(f"Failed to write shell CSS: {e}")
+        
         # Set wallpaper if specified
         if theme.wallpaper and Path(theme.wallpaper).exists():
-            os.system(f'gsettings set org.gnome.desktop.background picture-uri "file://{theme.wallpaper}"')
+            self._set_wallpaper(Path(theme.wallpaper).resolve().as_uri())
         
         logger.info(f"Applied theme: {theme.name}")
     
+    def _set_wallpaper(self, uri: str):
+        """Point the desktop background at a file:// URI"""
+        if self._bg_settings is not None:
+            # The write is only queued in dconf until the settings are synced,
+            # so a short-lived process would exit before it lands
+            if self._bg_settings.set_string('picture-uri', uri):
+                Gio.Settings.sync()
+                return
+            logger.warning("GSettings rejected the wallpaper, falling back to gsettings")
+        try:
+            subprocess.run(
+                ['gsettings', 'set', BACKGROUND_SCHEMA, 'picture-uri', uri],
+                check=True,
+                capture_output=True
+            )
+        except Exception as e:
+            logger.warning(f"Failed to set wallpaper: {e}")
+    
     def install_theme(self, theme_path: str) -> bool:
         """Install a theme from file"""
         try:
@@ -457,7 +604,7 @@ class ThemeManager:
     
     def uninstall_theme(self, theme_id: str) -> bool:
         """Uninstall a user theme"""
-        if theme_id in THEMES:
+        if theme_id in _THEME_BUILDERS:
             return False  # Can't uninstall built-in themes
         
         theme_file = self.USER_THEMES_DIR / f"{theme_id}.json"
@@ -6,26 +6,26 @@ Uses wlroots for Wayland compositor functionality.
 """
 
 import os
+import re
 import sys
 import signal
 import asyncio
 import logging
 import json
-import socket
 import struct
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
+from importlib.util import find_spec
 
-# Use PyWLRoots/pywayland if available, otherwise fall back to weston
-try:
-    HAS_WLROOTS = True
-    from pywayland.server import Display
-    from pywlroots.wlroots import wlr_compositor, wlr_backend, wlr_output_layout
-except ImportError:
-    HAS_WLROOTS = False
+# The shared agent client lives with the service modules (core/services)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services'))
+from aios_common.agent_client import AGENT_CODEC, AgentClient
+from aios_common.gtk_ui import GtkWindowMixin, software_rendering
 
 logging.basicConfig(
     level=logging.INFO,
@@ -37,6 +37,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger('aios-ui')
 
+# Fenced JSON action blocks in agent replies are shown as a placeholder
+_ACTION_BLOCK = re.compile(r'```json\s*\{[^`]+\}\s*```')
+
+# Length prefix used by the agent IPC framing
+_LEN_HDR = struct.Struct('!I')
+
+# Agent requests are MessagePack when msgspec is available
+_encode, _decode = AGENT_CODEC
+
+# msgspec also decodes UIConfig straight into the dataclass
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+
+# Use PyWLRoots/pywayland if available, otherwise fall back to weston. The
+# bindings are only looked up here, not imported, so other backends skip them
+def _has_wlroots() -> bool:
+    return find_spec('pywayland') is not None and find_spec('pywlroots') is not None
+
 
 @dataclass
 class UIConfig:
@@ -49,57 +71,96 @@ class UIConfig:
     agent_socket: str = "/run/aios/agent.sock"
     show_clock: bool = True
     clock_format: str = "%H:%M"
+    lite_css: Optional[bool] = None  # None: enable under software rendering
     wallpaper: Optional[str] = None
     
     @classmethod
     def load(cls, path: str = "/etc/aios/ui.conf") -> 'UIConfig':
-        config = cls()
-        if os.path.exists(path):
+        try:
+            data = Path(path).read_bytes()
+        except FileNotFoundError:
+            return cls()
+        except OSError as e:
+            logger.warning(f"Failed to load config: {e}")
+            return cls()
+        
+        if HAS_MSGSPEC:
+            # Parses and type-checks straight into the dataclass; unknown keys are ignored
             try:
-                with open(path) as f:
-                    data = json.load(f)
-                    for key, value in data.items():
-                        if hasattr(config, key):
-                            setattr(config, key, value)
-            except Exception as e:
+                return msgspec.json.decode(data, type=cls)
+            except msgspec.DecodeError as e:
                 logger.warning(f"Failed to load config: {e}")
+                return cls()
+        
+        config = cls()
+        try:
+            for key, value in json.loads(data).items():
+                if hasattr(config, key):
+                    setattr(config, key, value)
+        except Exception as e:
+            logger.warning(f"Failed to load config: {e}")
         return config
 
 
-class AgentClient:
-    """Client for AI-OS Agent daemon"""
+class AsyncAgentClient:
+    """asyncio client for the AI-OS Agent daemon
+    
+    Requests are pipelined on one connection. The daemon answers frames in
+    the order it receives them, so each reply resolves the oldest pending
+    future.
+    """
     
     def __init__(self, socket_path: str):
         self.socket_path = socket_path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: deque = deque()
+        self._connect_lock = asyncio.Lock()
+    
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+                asyncio.get_running_loop().create_task(self._read_replies(reader, self._writer))
+            return self._writer
+    
+    async def _read_replies(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                length, = _LEN_HDR.unpack(await reader.readexactly(_LEN_HDR.size))
+                reply = _decode(await reader.readexactly(length))
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except Exception as e:
+            # Connection gone: fail whatever was in flight and reconnect on the next send
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Agent connection lost: {e!r}"))
     
-    def send(self, request: dict) -> dict:
+    async def send(self, request: dict) -> dict:
         """Send request to agent"""
         try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            sock.connect(self.socket_path)
-            
-            data = json.dumps(request).encode('utf-8')
-            sock.sendall(struct.pack('!I', len(data)))
-            sock.sendall(data)
-            
-            length_data = sock.recv(4)
-            length = struct.unpack('!I', length_data)[0]
-            response_data = sock.recv(length)
-            
-            sock.close()
-            return json.loads(response_data.decode('utf-8'))
+            writer = await self._ensure_connected()
+            data = _encode(request)
+            future = asyncio.get_running_loop().create_future()
+            # Queue and write without yielding so replies match send order
+            self._pending.append(future)
+            writer.write(_LEN_HDR.pack(len(data)) + data)
+            await writer.drain()
+            return await future
         except Exception as e:
             logger.error(f"Agent error: {e}")
             return {'status': 'error', 'message': str(e)}
     
-    def chat(self, text: str) -> dict:
-        return self.send({'cmd': 'chat', 'text': text})
-    
-    def status(self) -> dict:
-        return self.send({'cmd': 'status'})
+    async def chat(self, text: str) -> dict:
+        return await self.send({'cmd': 'chat', 'text': text})
     
-    def action(self, action: dict) -> dict:
-        return self.send({'cmd': 'action', 'action': action})
+    async def status(self) -> dict:
+        return await self.send({'cmd': 'status'})
 
 
 class GTKFallbackUI:
@@ -110,7 +171,9 @@ class GTKFallbackUI:
     
     def __init__(self, config: UIConfig):
         self.config = config
-        self.agent = AgentClient(config.agent_socket)
+        # Blocking client for the terminal UI; the GTK UI uses the async one
+        self.agent = AgentClient(config.agent_socket, encode=_encode, decode=_decode)
+        self.async_agent = AsyncAgentClient(config.agent_socket)
         
     def run(self):
         """Run the GTK UI"""
@@ -118,26 +181,10 @@ class GTKFallbackUI:
             import gi
             gi.require_version('Gtk', '4.0')
             gi.require_version('Adw', '1')
-            from gi.repository import Gtk, Adw, Gdk, GLib, Pango
+            from gi.repository import Adw, GLib, Gtk, Pango
             
-            class AIosWindow(Adw.ApplicationWindow):
-                def __init__(self, app, config, agent):
-                    super().__init__(application=app)
-                    self.config = config
-                    self.agent = agent
-                    self._setup_ui()
-                    
-                def _setup_ui(self):
-                    self.set_title("AI-OS")
-                    self.set_default_size(1024, 768)
-                    self.fullscreen()
-                    
-                    # Main container
-                    main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
-                    self.set_content(main_box)
-                    
-                    # Apply dark theme
-                    css = b"""
+            class AIosWindow(GtkWindowMixin, Adw.ApplicationWindow):
+                CSS = b"""
                     window {
                         background: linear-gradient(180deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
                     }
@@ -175,14 +222,49 @@ class GTKFallbackUI:
                         padding: 20px;
                     }
                     """
+                
+                # Overrides for software rendering, where gradients, rounded
+                # corners, shadows and transitions are slow to draw
+                LITE_CSS = b"""
+                    * {
+                        box-shadow: none;
+                        transition: none;
+                    }
+                    window {
+                        background: #1a1a2e;
+                    }
+                    .agent-button {
+                        background: #667eea;
+                        border-radius: 0;
+                    }
+                    .agent-entry {
+                        border-radius: 0;
+                    }
+                    """
+                
+                def __init__(self, app, config, agent, loop):
+                    super().__init__(application=app)
+                    self.config = config
+                    self.agent = agent
+                    self._loop = loop
+                    self._last_clock = ''
+                    self._last_day = None
+                    self._setup_ui()
                     
-                    css_provider = Gtk.CssProvider()
-                    css_provider.load_from_data(css)
-                    Gtk.StyleContext.add_provider_for_display(
-                        Gdk.Display.get_default(),
-                        css_provider,
-                        Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-                    )
+                def _setup_ui(self):
+                    self.set_title("AI-OS")
+                    self.set_default_size(1024, 768)
+                    self.fullscreen()
+                    
+                    # Main container
+                    main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+                    self.set_content(main_box)
+                    
+                    # Apply dark theme
+                    lite = self.config.lite_css
+                    if lite is None:
+                        lite = software_rendering()
+                    self.ensure_css(self.CSS + self.LITE_CSS if lite else self.CSS)
                     
                     # Spacer
                     main_box.append(Gtk.Box(vexpand=True))
@@ -226,14 +308,29 @@ class GTKFallbackUI:
                     self.response_label.set_margin_bottom(50)
                     main_box.append(self.response_label)
                     
-                    # Update clock every second
-                    GLib.timeout_add_seconds(1, self._update_clock)
+                    # Update clock every second, aligned to the wall-clock second
+                    self._schedule_tick()
                     self._update_clock()
                 
                 def _update_clock(self):
+                    # After the first render, skip ticks while the window is unmapped
+                    if self._last_day is not None and not self.get_mapped():
+                        return True
                     now = datetime.now()
-                    self.clock_label.set_text(now.strftime(self.config.clock_format))
-                    self.date_label.set_text(now.strftime("%A, %B %d"))
+                    # set_text restyles the label, so only call it when the text changes
+                    fmt = self.config.clock_format
+                    if fmt == "%H:%M":
+                        clock = f"{now.hour:02d}:{now.minute:02d}"
+                    else:
+                        clock = now.strftime(fmt)
+                    if clock != self._last_clock:
+                        self._last_clock = clock
+                        self.clock_label.set_text(clock)
+                    # The date is locale-formatted, so strftime runs once a day
+                    day = now.date()
+                    if day != self._last_day:
+                        self._last_day = day
+                        self.date_label.set_text(now.strftime("%A, %B %d"))
                     return True
                 
                 def _on_submit(self, widget):
@@ -242,39 +339,40 @@ class GTKFallbackUI:
                         self.entry.set_text("")
                         self.response_label.set_text("Processing...")
                         
-                        # Process in background
-                        import threading
-                        def process():
-                            response = self.agent.chat(text)
-                            from gi.repository import GLib
-                            GLib.idle_add(self._show_response, response)
-                        
-                        thread = threading.Thread(target=process)
-                        thread.start()
+                        # Runs on the agent I/O loop; the reply is marshalled back to GTK
+                        future = asyncio.run_coroutine_threadsafe(self.agent.chat(text), self._loop)
+                        future.add_done_callback(
+                            lambda f: GLib.idle_add(self._show_response, f.result()))
                 
                 def _show_response(self, response):
                     if response.get('status') == 'ok':
                         text = response.get('response', '')
-                        # Clean up JSON blocks
-                        import re
-                        clean_text = re.sub(r'```json\s*\{[^`]+\}\s*```', '[Action executed]', text)
-                        self.response_label.set_text(clean_text)
+                        # Clean up JSON blocks; most replies have none
+                        if '```json' in text:
+                            text = _ACTION_BLOCK.sub('[Action executed]', text)
+                        self.response_label.set_text(text)
                     else:
                         self.response_label.set_text(f"Error: {response.get('message')}")
                     return False
             
             class AIosApp(Adw.Application):
-                def __init__(self, config, agent):
+                def __init__(self, config, agent, loop):
                     super().__init__(application_id='com.aios.ui')
                     self.config = config
                     self.agent = agent
+                    self.loop = loop
                 
                 def do_activate(self):
-                    win = AIosWindow(self, self.config, self.agent)
+                    win = AIosWindow(self, self.config, self.agent, self.loop)
                     win.present()
             
-            app = AIosApp(self.config, self.agent)
+            # Agent round-trips run on an asyncio loop off the GTK main loop
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='agent-io', daemon=True).start()
+            
+            app = AIosApp(self.config, self.async_agent, loop)
             app.run(None)
+            loop.call_soon_threadsafe(loop.stop)
             
         except Exception as e:
             logger.error(f"GTK UI failed: {e}")
@@ -385,7 +483,7 @@ def main():
     if os.environ.get('AIOS_UI_MODE') == 'terminal':
         ui = GTKFallbackUI(config)
         ui._run_terminal_ui()
-    elif HAS_WLROOTS:
+    elif _has_wlroots():
         logger.info("Using wlroots compositor")
         # Direct wlroots implementation would go here
         ui = GTKFallbackUI(config)
@@ -6,58 +6,73 @@ GTK-based graphical shell for AI-OS.
 
 import os
 import sys
-import json
-import socket
-import struct
-import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Try GTK first
-try:
-    import gi
-    gi.require_version('Gtk', '4.0')
-    from gi.repository import Gtk, Gdk, GLib, Pango
-    HAS_GTK = True
-except ImportError:
-    HAS_GTK = False
+# The shared agent client lives with the service modules (core/services)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services'))
+from aios_common.agent_client import AGENT_CODEC
+from aios_common.agent_client import AgentClient as BaseAgentClient
+from aios_common.gtk_ui import GtkWindowMixin, software_rendering
 
 
-class AgentClient:
-    """Client for communicating with AI Agent daemon"""
+class AgentClient(BaseAgentClient):
+    """Agent client for the shell
     
-    SOCKET_PATH = "/run/aios/agent.sock"
+    Status replies are reused for immediate repeats; chat prompts can
+    trigger actions, so they always go to the agent.
+    """
     
-    def send(self, message: dict) -> dict:
-        """Send message to agent and get response"""
-        try:
-            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
-                sock.connect(self.SOCKET_PATH)
-                
-                # Send message
-                data = json.dumps(message).encode('utf-8')
-                sock.sendall(struct.pack('!I', len(data)))
-                sock.sendall(data)
-                
-                # Read response
-                length_data = sock.recv(4)
-                if not length_data:
-                    return {'error': 'No response'}
-                
-                length = struct.unpack('!I', length_data)[0]
-                response_data = sock.recv(length)
-                
-                return json.loads(response_data.decode('utf-8'))
-        except Exception as e:
-            return {'error': str(e)}
+    STATUS_TTL = 5.0
     
-    def chat(self, text: str) -> dict:
-        return self.send({'cmd': 'chat', 'text': text})
+    def __init__(self):
+        encode, decode = AGENT_CODEC
+        super().__init__(encode=encode, decode=decode)
+        self._status_cache = None
     
     def status(self) -> dict:
-        return self.send({'cmd': 'status'})
+        now = time.monotonic()
+        hit = self._status_cache
+        if hit is not None and now - hit[0] < self.STATUS_TTL:
+            return hit[1]
+        response = super().status()
+        if response.get('status') != 'error':
+            self._status_cache = (now, response)
+        return response
+
+
+def _reply_lines(response: dict, with_data: bool = False) -> list:
+    """Lines for an agent chat reply: the text, then any action result"""
+    lines = [response.get('response', 'No response')]
+    action_result = response.get('action_result')
+    if action_result:
+        if action_result.get('success'):
+            lines.append(f"✓ {action_result.get('message', 'Action completed')}")
+        else:
+            lines.append(f"✗ {action_result.get('message', 'Action failed')}")
+        
+        # Show info data if present
+        data = action_result.get('data') if with_data else None
+        if data:
+            lines.extend(f"  {key}: {value}" for key, value in data.items())
+    return lines
+
 
+def _load_gtk() -> bool:
+    """Import the GTK bindings; only the graphical shell pays for them"""
+    global Gtk, Gdk, GLib, Pango
+    try:
+        import gi
+        gi.require_version('Gtk', '4.0')
+        from gi.repository import Gtk, Gdk, GLib, Pango
+        return True
+    except (ImportError, ValueError):
+        return False
 
-if HAS_GTK:
+
+def run_gtk_shell():
+    """Run GTK-based shell (call _load_gtk first)"""
     
     class AIosShell(Gtk.Application):
         """Main AI-OS Shell application"""
@@ -65,20 +80,30 @@ if HAS_GTK:
         def __init__(self):
             super().__init__(application_id='com.aios.shell')
             self.agent = AgentClient()
+            # One reused worker for agent round-trips, off the GTK main loop
+            self.io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agent-io')
             self.window = None
             
         def do_activate(self):
             if not self.window:
                 self.window = ShellWindow(self)
             self.window.present()
+        
+        def do_shutdown(self):
+            self.io.shutdown(wait=False, cancel_futures=True)
+            self.agent.close()
+            Gtk.Application.do_shutdown(self)
     
     
-    class ShellWindow(Gtk.ApplicationWindow):
+    class ShellWindow(GtkWindowMixin, Gtk.ApplicationWindow):
         """Main shell window"""
         
         def __init__(self, app):
             super().__init__(application=app, title="AI-OS")
             self.agent = app.agent
+            self._io = app.io
+            self._last_time = ''
+            self._last_day = None
             
             # Make fullscreen
             self.set_decorated(False)
@@ -90,8 +115,8 @@ if HAS_GTK:
             # Build UI
             self.build_ui()
             
-            # Start clock update
-            GLib.timeout_add_seconds(1, self.update_clock)
+            # Start clock update, aligned to the wall-clock second
+            self._schedule_tick()
         
         def apply_theme(self):
             """Apply AI-OS theme"""
@@ -101,14 +126,7 @@ if HAS_GTK:
             manager = ThemeManager(os.path.join(os.path.dirname(__file__), 'themes'))
             theme = manager.load_theme('default')
             
-            css_provider = Gtk.CssProvider()
-            css_provider.load_from_data(theme.to_css())
-            
-            Gtk.StyleContext.add_provider_for_display(
-                Gdk.Display.get_default(),
-                css_provider,
-                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-            )
+            self.ensure_css(theme.to_css(lite=software_rendering()))
         
         def build_ui(self):
             """Build the UI"""
@@ -180,14 +198,27 @@ if HAS_GTK:
             main_box.append(center_box)
             
             # Update clock immediately
-            self.update_clock()
+            self._update_clock()
         
-        def update_clock(self):
+        def _update_clock(self):
             """Update clock display"""
+            # After the first render, skip ticks while the window is unmapped
+            if self._last_day is not None and not self.get_mapped():
+                return True
             now = datetime.now()
-            self.time_label.set_text(now.strftime("%H:%M"))
-            self.date_label.set_text(now.strftime("%A, %B %d, %Y"))
-            self.clock_mini.set_text(now.strftime("%H:%M:%S"))
+            # Numeric times are formatted directly; strftime only runs for the
+            # locale-dependent date, once a day
+            hms = f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+            self.clock_mini.set_text(hms)
+            # set_text restyles the label; the large clock and date rarely change
+            hm = hms[:5]
+            if hm != self._last_time:
+                self._last_time = hm
+                self.time_label.set_text(hm)
+            day = now.date()
+            if day != self._last_day:
+                self._last_day = day
+                self.date_label.set_text(now.strftime("%A, %B %d, %Y"))
             return True
         
         def on_input_activate(self, entry):
@@ -203,28 +234,15 @@ if HAS_GTK:
             def process():
                 response = self.agent.chat(text)
                 
-                if 'error' in response:
-                    result = f"Error: {response['error']}"
+                if response.get('status') == 'error':
+                    result = f"Error: {response.get('message')}"
                 else:
-                    result = response.get('response', 'No response')
-                    
-                    # Show action result if any
-                    action_result = response.get('action_result')
-                    if action_result:
-                        if action_result.get('success'):
-                            result += f"\n✓ {action_result.get('message', 'Action completed')}"
-                        else:
-                            result += f"\n✗ {action_result.get('message', 'Action failed')}"
+                    result = '\n'.join(_reply_lines(response))
                 
                 GLib.idle_add(self.response_label.set_text, result)
             
-            thread = threading.Thread(target=process)
-            thread.daemon = True
-            thread.start()
-
-
-def run_gtk_shell():
-    """Run GTK-based shell"""
+            self._io.submit(process)
+    
     app = AIosShell()
     app.run([])
 
@@ -272,38 +290,28 @@ Examples:
             
             if user_input.lower() == 'status':
                 response = agent.status()
-                if 'error' in response:
-                    print(f"Error: {response['error']}")
+                if response.get('status') == 'error':
+                    print(f"Error: {response.get('message')}")
                 else:
-                    print(f"Running: {response.get('running')}")
-                    print(f"AI Configured: {response.get('ai_configured')}")
                     system = response.get('system', {})
-                    print(f"Hostname: {system.get('hostname')}")
-                    print(f"Kernel: {system.get('kernel')}")
-                    print(f"CPU: {system.get('cpu', 'Unknown')}")
-                    print(f"Memory: {system.get('memory_free_mb', 0)}/{system.get('memory_mb', 0)} MB")
+                    sys.stdout.write(
+                        f"Running: {response.get('running')}\n"
+                        f"AI Configured: {response.get('ai_configured')}\n"
+                        f"Hostname: {system.get('hostname')}\n"
+                        f"Kernel: {system.get('kernel')}\n"
+                        f"CPU: {system.get('cpu', 'Unknown')}\n"
+                        f"Memory: {system.get('memory_free_mb', 0)}/{system.get('memory_mb', 0)} MB\n"
+                    )
+                    sys.stdout.flush()
                 continue
             
             # Send to agent
             response = agent.chat(user_input)
             
-            if 'error' in response:
-                print(f"Error: {response['error']}")
+            if response.get('status') == 'error':
+                print(f"Error: {response.get('message')}")
             else:
-                print(f"\n{response.get('response', 'No response')}")
-                
-                action_result = response.get('action_result')
-                if action_result:
-                    if action_result.get('success'):
-                        print(f"✓ {action_result.get('message', 'Action completed')}")
-                    else:
-                        print(f"✗ {action_result.get('message', 'Action failed')}")
-                    
-                    # Show info data if present
-                    data = action_result.get('data')
-                    if data:
-                        for key, value in data.items():
-                            print(f"  {key}: {value}")
+                print('\n' + '\n'.join(_reply_lines(response, with_data=True)))
             
             print()
             
@@ -317,7 +325,8 @@ def main():
     """Main entry point"""
     # Check for display
     if os.environ.get('WAYLAND_DISPLAY') or os.environ.get('DISPLAY'):
-        if HAS_GTK:
+        # GTK is only imported once a display is known to be available
+        if _load_gtk():
             run_gtk_shell()
         else:
             print("GTK not available, falling back to terminal")
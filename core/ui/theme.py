@@ -5,12 +5,13 @@ Handles theme loading and application
 
 import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict
 
 logger = logging.getLogger('aios-shell')
 
+
 @dataclass
 class Theme:
     name: str
@@ -21,6 +22,14 @@ class Theme:
     accent_color: str
     input_bg: str
     
+    # Encoded CSS keyed by the lite flag, reset whenever a field is reassigned
+    _css_cache: Dict[bool, bytes] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        if not name.startswith('_'):
+            self.__dict__.get('_css_cache', {}).clear()
+        object.__setattr__(self, name, value)
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Theme':
         return cls(
@@ -33,10 +42,24 @@ class Theme:
             input_bg=data.get('input_bg', 'rgba(255, 255, 255, 0.1)')
         )
     
-    def to_css(self) -> bytes:
+    def to_css(self, lite: bool = False) -> bytes:
+        """Render the stylesheet.
+        
+        ``lite`` drops gradients, rounded corners, shadows and transitions,
+        which are slow under GTK's software renderer.
+        """
+        cached = self._css_cache.get(lite)
+        if cached is not None:
+            return cached
+        if lite:
+            background = self.bg_gradient_start
+            radius = 0
+        else:
+            background = f"linear-gradient(180deg, {self.bg_gradient_start} 0%, {self.bg_gradient_end} 100%)"
+            radius = 30
         css = f"""
             window {{
-                background: linear-gradient(180deg, {self.bg_gradient_start} 0%, {self.bg_gradient_end} 100%);
+                background: {background};
             }}
             .time-label {{
                 font-size: 72px;
@@ -50,7 +73,7 @@ class Theme:
             .agent-input {{
                 font-size: 18px;
                 padding: 16px 24px;
-                border-radius: 30px;
+                border-radius: {radius}px;
                 background: {self.input_bg};
                 border: none;
                 color: {self.text_primary};
@@ -74,7 +97,15 @@ class Theme:
                 color: {self.text_primary};
             }}
         """
-        return css.encode('utf-8')
+        if lite:
+            css += """
+            * {
+                box-shadow: none;
+                transition: none;
+            }
+        """
+        self._css_cache[lite] = data = css.encode('utf-8')
+        return data
 
 class ThemeManager:
     def __init__(self, theme_dir: str = "themes"):
@@ -10,14 +10,64 @@ import signal
 import asyncio
 import logging
 import json
-import socket
-import struct
 from pathlib import Path
 from typing import Optional, Callable
 from dataclasses import dataclass
+from array import array
+from operator import mul
+import math
 import subprocess
 import threading
+import time
 import queue
+import re
+
+# The shared agent client lives with the service modules (core/services)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services'))
+from aios_common.agent_client import AgentClient
+from aios_common.framed_ipc import _loads
+
+try:
+    import pyaudio
+    HAS_PYAUDIO = True
+except ImportError:
+    HAS_PYAUDIO = False
+
+try:
+    import webrtcvad
+    HAS_WEBRTCVAD = True
+except ImportError:
+    HAS_WEBRTCVAD = False
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from openwakeword.model import Model as WakeWordModel
+    HAS_OPENWAKEWORD = True
+except ImportError:
+    HAS_OPENWAKEWORD = False
+
+try:
+    from vosk import Model, KaldiRecognizer
+    HAS_VOSK = True
+except ImportError:
+    HAS_VOSK = False
+
+try:
+    import speech_recognition as sr
+    HAS_SPEECH_RECOGNITION = True
+except ImportError:
+    HAS_SPEECH_RECOGNITION = False
+
+try:
+    import pyttsx3
+    HAS_PYTTSX3 = True
+except ImportError:
+    HAS_PYTTSX3 = False
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,6 +79,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger('aios-voice')
 
+# Socket buffers for the agent connection, sized so a long reply arrives
+# in as few reads as possible
+AGENT_SOCK_BUF_SIZE = 256 * 1024
+
+# JSON action blocks in agent replies are not meant to be spoken. Non-greedy
+# with DOTALL so malformed input can't trigger runaway backtracking.
+_JSON_BLOCK_RE = re.compile(r'```json.*?```', re.DOTALL)
+
+
+def _vosk_field(raw: str, key: str) -> Optional[str]:
+    """Return one field of a Vosk JSON result, or None if it is empty
+
+    Between utterances Vosk emits {"text" : ""} and {"partial" : ""} for
+    nearly every chunk, so those are recognized without parsing.
+    """
+    if f'"{key}" : ""' in raw or f'"{key}": ""' in raw:
+        return None
+    return _loads(raw).get(key, '').strip() or None
+
+
+if HAS_NUMPY:
+    def _rms(pcm: bytes) -> float:
+        """RMS amplitude of 16-bit PCM"""
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.int32)
+        return float(np.sqrt(np.mean(x * x))) if x.size else 0.0
+else:
+    def _rms(pcm: bytes) -> float:
+        """RMS amplitude of 16-bit PCM"""
+        samples = array('h', pcm)
+        return math.sqrt(sum(map(mul, samples, samples)) / len(samples)) if samples else 0.0
+
 
 @dataclass
 class VoiceConfig:
@@ -37,10 +118,16 @@ class VoiceConfig:
     language: str = "en-US"
     sample_rate: int = 16000
     channels: int = 1
-    chunk_size: int = 1024
+    chunk_size: int = 320
     silence_threshold: float = 500
     min_phrase_length: float = 0.5
     max_phrase_length: float = 10.0
+    vad_aggressiveness: int = 2
+    vad_hangover: float = 0.5
+    # openWakeWord model name or path; unset keeps Vosk substring matching
+    wake_word_model: Optional[str] = None
+    wake_word_threshold: float = 0.5
+    command_timeout: float = 5.0
     agent_socket: str = "/run/aios/agent.sock"
     
     @classmethod
@@ -65,19 +152,45 @@ class AudioCapture:
         self.config = config
         self._stream = None
         self._pyaudio = None
+        # Two seconds of 16-bit audio, filled by the PortAudio callback
+        self._ring = bytearray(config.sample_rate * config.channels * 2 * 2)
+        self._w = 0
+        self._r = 0
+        self._cond = threading.Condition()
         
+    def _cb(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: copy captured frames into the ring"""
+        data = memoryview(in_data)
+        size = len(self._ring)
+        with self._cond:
+            pos = self._w % size
+            n = min(len(data), size - pos)
+            self._ring[pos:pos + n] = data[:n]
+            if n < len(data):
+                self._ring[:len(data) - n] = data[n:]
+            self._w += len(data)
+            # Reader fell more than a ring behind: drop the oldest audio
+            if self._w - self._r > size:
+                self._r = self._w - size
+            self._cond.notify()
+        return (None, self._continue)
+    
     def start(self):
         """Start audio capture"""
+        if not HAS_PYAUDIO:
+            logger.error("Failed to start audio capture: pyaudio not installed")
+            raise RuntimeError("Audio capture not available")
         try:
-            import pyaudio
             self._pyaudio = pyaudio.PyAudio()
+            self._continue = pyaudio.paContinue
             
             self._stream = self._pyaudio.open(
                 format=pyaudio.paInt16,
                 channels=self.config.channels,
                 rate=self.config.sample_rate,
                 input=True,
-                frames_per_buffer=self.config.chunk_size
+                frames_per_buffer=self.config.chunk_size,
+                stream_callback=self._cb
             )
             
             logger.info("Audio capture started")
@@ -87,9 +200,20 @@ class AudioCapture:
     
     def read(self) -> bytes:
         """Read audio chunk"""
-        if self._stream:
-            return self._stream.read(self.config.chunk_size, exception_on_overflow=False)
-        return b''
+        if not self._stream:
+            return b''
+        want = self.config.chunk_size * self.config.channels * 2
+        size = len(self._ring)
+        with self._cond:
+            while self._w - self._r < want:
+                if not self._cond.wait(timeout=1.0):
+                    return b''
+            pos = self._r % size
+            self._r += want
+            end = pos + want
+            if end <= size:
+                return bytes(self._ring[pos:end])
+            return bytes(self._ring[pos:]) + bytes(self._ring[:end - size])
     
     def stop(self):
         """Stop audio capture"""
@@ -108,49 +232,82 @@ class SpeechRecognizer:
         self.config = config
         self._recognizer = None
         self._model = None
+        self._vad = None
+        # webrtcvad only accepts 10/20/30 ms frames of 16-bit mono PCM
+        self._vad_frame = config.sample_rate // 50 * 2
         
     def initialize(self):
         """Initialize speech recognition"""
-        try:
-            # Try Vosk first (offline)
-            from vosk import Model, KaldiRecognizer
-            
-            model_path = "/usr/share/vosk/model"
-            if os.path.exists(model_path):
-                self._model = Model(model_path)
-                self._recognizer = KaldiRecognizer(
-                    self._model,
-                    self.config.sample_rate
-                )
-                logger.info("Using Vosk for speech recognition (offline)")
-                return
-        except ImportError:
-            pass
+        if HAS_WEBRTCVAD:
+            self._vad = webrtcvad.Vad(self.config.vad_aggressiveness)
+            logger.info("Gating recognition with webrtcvad")
         
-        try:
-            # Fall back to SpeechRecognition (online)
-            import speech_recognition as sr
+        # Try Vosk first (offline)
+        model_path = "/usr/share/vosk/model"
+        if HAS_VOSK and os.path.exists(model_path):
+            self._model = Model(model_path)
+            self._recognizer = KaldiRecognizer(
+                self._model,
+                self.config.sample_rate
+            )
+            # Only the text is used; skip word timings and alternatives
+            self._recognizer.SetWords(False)
+            try:
+                self._recognizer.SetPartialWords(False)
+                self._recognizer.SetMaxAlternatives(0)
+            except AttributeError:
+                pass
+            logger.info("Using Vosk for speech recognition (offline)")
+            return
+        
+        # Fall back to SpeechRecognition (online)
+        if HAS_SPEECH_RECOGNITION:
             self._recognizer = sr.Recognizer()
             logger.info("Using Google Speech Recognition (online)")
-        except ImportError:
-            logger.error("No speech recognition library available")
-            raise RuntimeError("Speech recognition not available")
+            return
+        
+        logger.error("No speech recognition library available")
+        raise RuntimeError("Speech recognition not available")
+    
+    def is_speech(self, audio_data: bytes) -> bool:
+        """Return True if any 20 ms frame of the chunk contains speech"""
+        # Cheap energy gate first; quiet chunks never reach the VAD
+        if _rms(audio_data) < self.config.silence_threshold:
+            return False
+        if self._vad is None:
+            return True
+        step = self._vad_frame
+        rate = self.config.sample_rate
+        for off in range(0, len(audio_data) - step + 1, step):
+            if self._vad.is_speech(audio_data[off:off + step], rate):
+                return True
+        return False
     
-    def recognize(self, audio_data: bytes) -> Optional[str]:
+    @property
+    def streaming(self) -> bool:
+        """True if the backend accepts audio incrementally (Vosk)"""
+        return hasattr(self._recognizer, 'AcceptWaveform')
+    
+    def flush(self) -> Optional[str]:
+        """Finish the current utterance and return its final text"""
+        if hasattr(self._recognizer, 'FinalResult'):
+            try:
+                return _vosk_field(self._recognizer.FinalResult(), 'text')
+            except Exception as e:
+                logger.error(f"Recognition error: {e}")
+        return None
+    
+    def recognize(self, audio_data: bytes, partial: bool = True) -> Optional[str]:
         """Recognize speech from audio data"""
         try:
             if hasattr(self._recognizer, 'AcceptWaveform'):
                 # Vosk recognizer
                 if self._recognizer.AcceptWaveform(audio_data):
-                    result = json.loads(self._recognizer.Result())
-                    return result.get('text', '').strip()
-                else:
-                    partial = json.loads(self._recognizer.PartialResult())
-                    return partial.get('partial', '').strip()
+                    return _vosk_field(self._recognizer.Result(), 'text')
+                elif partial:
+                    return _vosk_field(self._recognizer.PartialResult(), 'partial')
             else:
                 # SpeechRecognition (needs audio file or proper format)
-                import speech_recognition as sr
-                
                 # Convert raw audio to AudioData
                 audio = sr.AudioData(
                     audio_data,
@@ -172,67 +329,134 @@ class SpeechRecognizer:
             return None
 
 
+class WakeWordDetector:
+    """Always-on wake word model that runs ahead of full recognition"""
+    
+    # openWakeWord scores 80 ms steps; smaller chunks are batched up to one
+    STRIDE = 1280
+    
+    def __init__(self, config: VoiceConfig):
+        self.config = config
+        self._model = None
+        self._frame = None
+        self._fill = 0
+    
+    @property
+    def available(self) -> bool:
+        return self._model is not None
+    
+    def initialize(self):
+        """Load the wake word model if one is configured"""
+        if not self.config.wake_word_model:
+            return
+        if not HAS_OPENWAKEWORD:
+            logger.warning("openwakeword not installed, using Vosk for wake word")
+            return
+        try:
+            self._model = WakeWordModel(wakeword_models=[self.config.wake_word_model])
+            self._frame = np.zeros(self.STRIDE, dtype=np.int16)
+            logger.info(f"Using openWakeWord model: {self.config.wake_word_model}")
+        except Exception as e:
+            logger.error(f"Failed to load wake word model: {e}")
+    
+    def detect(self, audio_data: bytes) -> bool:
+        """Return True if the wake word score crosses the threshold"""
+        x = np.frombuffer(audio_data, dtype=np.int16)
+        frame = self._frame
+        triggered = False
+        pos = 0
+        while pos < len(x):
+            n = min(self.STRIDE - self._fill, len(x) - pos)
+            frame[self._fill:self._fill + n] = x[pos:pos + n]
+            self._fill += n
+            pos += n
+            if self._fill == self.STRIDE:
+                self._fill = 0
+                scores = self._model.predict(frame)
+                if max(scores.values(), default=0.0) >= self.config.wake_word_threshold:
+                    triggered = True
+        return triggered
+    
+    def reset(self):
+        self._fill = 0
+        self._model.reset()
+
+
 class TextToSpeech:
-    """Text-to-speech using espeak or pico2wave"""
+    """Text-to-speech using espeak or pico2wave
+    
+    One long-lived engine is driven by a worker thread. speak() only
+    queues the text, and phrases queued while another is playing are
+    spoken in the same batch.
+    """
     
     def __init__(self):
         self._engine = None
+        self._q: queue.Queue = queue.Queue()
+        self.speaking = False
         self._initialize()
     
     def _initialize(self):
         """Initialize TTS engine"""
-        try:
-            import pyttsx3
-            self._engine = pyttsx3.init()
-            self._engine.setProperty('rate', 150)
-            logger.info("Using pyttsx3 for TTS")
-        except:
-            logger.info("Using espeak for TTS")
-    
-    def speak(self, text: str, blocking: bool = True):
-        """Speak text"""
+        threading.Thread(target=self._worker, name='voice-tts', daemon=True).start()
+        if HAS_PYTTSX3:
+            try:
+                self._engine = pyttsx3.init()
+                self._engine.setProperty('rate', 150)
+                logger.info("Using pyttsx3 for TTS")
+                return
+            except Exception:
+                self._engine = None
+        logger.info("Using espeak for TTS")
+    
+    def _worker(self):
+        while True:
+            batch = [self._q.get()]
+            self.speaking = True
+            while True:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            texts = [t for t in batch if t is not None]
+            try:
+                if texts:
+                    self._say(texts)
+            finally:
+                if self._q.empty():
+                    self.speaking = False
+                for _ in batch:
+                    self._q.task_done()
+            if stop:
+                return
+    
+    def _say(self, texts):
         try:
             if self._engine:
-                self._engine.say(text)
-                if blocking:
-                    self._engine.runAndWait()
+                for text in texts:
+                    self._engine.say(text)
+                self._engine.runAndWait()
             else:
                 # Use espeak directly
                 subprocess.run(
-                    ['espeak', '-s', '150', text],
+                    ['espeak', '-s', '150', ' '.join(texts)],
                     capture_output=True
                 )
         except Exception as e:
             logger.error(f"TTS error: {e}")
-
-
-class AgentClient:
-    """Client for communicating with AI-OS Agent daemon"""
     
-    def __init__(self, socket_path: str):
-        self.socket_path = socket_path
+    def speak(self, text: str, blocking: bool = False):
+        """Speak text"""
+        # Set before queueing so listeners stop treating the mic as input
+        # before playback starts
+        self.speaking = True
+        self._q.put(text)
+        if blocking:
+            self._q.join()
     
-    def send_command(self, text: str) -> dict:
-        """Send voice command to agent"""
-        try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            sock.connect(self.socket_path)
-            
-            request = json.dumps({'cmd': 'chat', 'text': text}).encode('utf-8')
-            sock.sendall(struct.pack('!I', len(request)))
-            sock.sendall(request)
-            
-            # Receive response
-            length_data = sock.recv(4)
-            length = struct.unpack('!I', length_data)[0]
-            
-            response_data = sock.recv(length)
-            sock.close()
-            
-            return json.loads(response_data.decode('utf-8'))
-        except Exception as e:
-            logger.error(f"Agent communication error: {e}")
-            return {'status': 'error', 'message': str(e)}
+    def close(self):
+        self._q.put(None)
 
 
 class VoiceService:
@@ -242,23 +466,36 @@ class VoiceService:
         self.config = config
         self.audio = AudioCapture(config)
         self.recognizer = SpeechRecognizer(config)
+        self.wake = WakeWordDetector(config)
         self.tts = TextToSpeech()
-        self.agent = AgentClient(config.agent_socket)
+        self.agent = AgentClient(config.agent_socket, sock_buf_size=AGENT_SOCK_BUF_SIZE)
         self.running = False
         
-        self._audio_buffer = []
-        self._is_speaking = False
+        # Utterance audio for recognizers that can't stream (Google)
+        self._audio_buffer = bytearray()
+        self._audio_buffer_cap = int(
+            config.max_phrase_length * config.sample_rate * config.channels * 2
+        )
         self._wake_word_detected = False
         self._command_timeout = None
+        self._wake_lc = config.wake_word.lower()
+        self._wake_len = len(self._wake_lc)
+        
+        # Agent round trips run off the listen loop so audio keeps being
+        # consumed while a command is in flight
+        self._command_q: queue.Queue = queue.Queue(maxsize=4)
     
     def start(self):
         """Start voice service"""
         logger.info("Starting AI-OS Voice Service...")
         
         self.recognizer.initialize()
+        self.wake.initialize()
         self.audio.start()
         self.running = True
         
+        threading.Thread(target=self._command_worker, name='voice-cmd', daemon=True).start()
+        
         logger.info(f"Listening for wake word: '{self.config.wake_word}'")
         
         try:
@@ -272,21 +509,65 @@ class VoiceService:
         """Stop voice service"""
         logger.info("Stopping voice service...")
         self.running = False
+        # stop() runs from the signal handler, so it must never block on a
+        # full queue; pending commands are dropped to make room for the
+        # worker's sentinel
+        while True:
+            try:
+                self._command_q.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    self._command_q.get_nowait()
+                except queue.Empty:
+                    pass
+        self.tts.close()
         self.audio.stop()
     
     def _listen_loop(self):
         """Main listening loop"""
+        chunk_secs = self.config.chunk_size / self.config.sample_rate
+        speech_active = False
+        silence = 0.0
+        
         while self.running:
             try:
                 # Read audio chunk
                 audio_chunk = self.audio.read()
                 
                 # Skip if we're speaking
-                if self._is_speaking:
+                if self.tts.speaking:
                     continue
                 
-                # Recognize speech
-                text = self.recognizer.recognize(audio_chunk)
+                # With a wake word model, the recognizer stays idle until
+                # the model fires and for a short window afterwards.
+                if self.wake.available and not self._wake_word_detected:
+                    if self.recognizer.is_speech(audio_chunk) and self.wake.detect(audio_chunk):
+                        self.wake.reset()
+                        self._wake_word_detected = True
+                        self._respond("Yes?")
+                        self._command_timeout = time.monotonic() + self.config.command_timeout
+                    continue
+                
+                # Only wake the recognizer for voiced audio; after the
+                # hangover period of silence, flush the utterance.
+                if self.recognizer.is_speech(audio_chunk):
+                    speech_active = True
+                    silence = 0.0
+                    text = self._feed(audio_chunk)
+                elif speech_active:
+                    silence += chunk_secs
+                    if silence < self.config.vad_hangover:
+                        text = self._feed(audio_chunk)
+                    else:
+                        speech_active = False
+                        text = self._end_utterance()
+                else:
+                    if (self._command_timeout is not None
+                            and time.monotonic() > self._command_timeout):
+                        self._wake_word_detected = False
+                        self._command_timeout = None
+                    continue
                 
                 if text:
                     self._process_speech(text)
@@ -294,41 +575,76 @@ class VoiceService:
             except Exception as e:
                 logger.error(f"Listen loop error: {e}")
     
+    def _feed(self, audio_chunk: bytes) -> Optional[str]:
+        """Pass voiced audio to the recognizer"""
+        if self.recognizer.streaming:
+            # Partials are only needed to spot the wake word in the text
+            return self.recognizer.recognize(audio_chunk, partial=not self.wake.available)
+        self._audio_buffer += audio_chunk
+        if len(self._audio_buffer) >= self._audio_buffer_cap:
+            return self._end_utterance()
+        return None
+    
+    def _end_utterance(self) -> Optional[str]:
+        """Finish the current utterance and return its text"""
+        if self.recognizer.streaming:
+            return self.recognizer.flush()
+        if not self._audio_buffer:
+            return None
+        audio = bytes(self._audio_buffer)
+        self._audio_buffer.clear()
+        return self.recognizer.recognize(audio)
+    
     def _process_speech(self, text: str):
         """Process recognized speech"""
-        text_lower = text.lower()
-        
         # Check for wake word
-        if self.config.wake_word in text_lower:
+        wake_idx = text.lower().find(self._wake_lc)
+        if wake_idx >= 0:
             self._wake_word_detected = True
             # Extract command after wake word
-            wake_idx = text_lower.find(self.config.wake_word)
-            command = text[wake_idx + len(self.config.wake_word):].strip()
+            command = text[wake_idx + self._wake_len:].strip()
             
             if command:
-                self._handle_command(command)
+                self._submit_command(command)
             else:
                 # Just wake word, wait for next phrase
                 self._respond("Yes?")
                 
         elif self._wake_word_detected:
             # If wake word was detected, treat next phrase as command
-            self._handle_command(text)
+            self._submit_command(text)
             self._wake_word_detected = False
     
+    def _submit_command(self, command: str):
+        """Queue a command for the command worker"""
+        try:
+            self._command_q.put_nowait(command)
+        except queue.Full:
+            logger.warning(f"Dropping voice command, agent busy: {command}")
+    
+    def _command_worker(self):
+        """Send queued commands to the agent one at a time"""
+        while True:
+            command = self._command_q.get()
+            if command is None:
+                return
+            try:
+                self._handle_command(command)
+            except Exception as e:
+                logger.error(f"Command error: {e}")
+    
     def _handle_command(self, command: str):
         """Handle a voice command"""
         logger.info(f"Voice command: {command}")
         
         # Send to agent
-        response = self.agent.send_command(command)
+        response = self.agent.chat(command)
         
         if response.get('status') == 'ok':
             reply = response.get('response', "I'm not sure what to say.")
             
             # Remove JSON code blocks from spoken response
-            import re
-            spoken_reply = re.sub(r'```json\s*\{[^`]+\}\s*```', '', reply).strip()
+            spoken_reply = _JSON_BLOCK_RE.sub('', reply).strip()
             
             if spoken_reply:
                 self._respond(spoken_reply)
@@ -344,11 +660,9 @@ class VoiceService:
             self._respond(f"Error: {response.get('message', 'unknown error')}")
     
     def _respond(self, text: str):
-        """Speak a response"""
-        self._is_speaking = True
+        """Queue a response to be spoken"""
         logger.info(f"Response: {text}")
         self.tts.speak(text)
-        self._is_speaking = False
 
 
 def main():
@@ -31,9 +31,12 @@ class EnhancedAsyncAgent(AsyncAgent):
         enable_federated_learning: bool = True,
         consul_host: str = "localhost",
         consul_port: int = 8500,
+        heartbeat_interval: float = 30.0,
     ):
         super().__init__(allowed_root, rpc_host, rpc_port)
         
+        self.heartbeat_interval = heartbeat_interval
+        
         self.enable_distributed_mesh = enable_distributed_mesh
         self.enable_llm_optimization = enable_llm_optimization
         self.enable_federated_learning = enable_federated_learning
@@ -139,27 +142,40 @@ class EnhancedAsyncAgent(AsyncAgent):
     
     async def enhanced_scheduler(self):
         """Scheduler with enhancement monitoring."""
+        # The loop only produces debug records; don't wake up for nothing
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        
+        last = None
         while not self.shutdown_event.is_set():
-            logger.debug("Heartbeat: agent running with enhancements")
-            
-            # Log distributed mesh status
-            if self.mesh:
-                logger.debug(f"Mesh peers: {len(self.mesh.peers)}, Role: {self.mesh.node.role.value}")
-            
-            # Log LLM optimizer stats
-            if self.llm_optimizer:
-                stats = self.llm_optimizer.get_statistics()
-                if stats['total_requests'] > 0:
+            snapshot = (
+                (len(self.mesh.peers), self.mesh.node.role.value) if self.mesh else None,
+                self.llm_optimizer.get_statistics() if self.llm_optimizer else None,
+                self.federated_coordinator.get_statistics() if self.federated_coordinator else None,
+            )
+            if snapshot != last:
+                last = snapshot
+                mesh, stats, fed_stats = snapshot
+                logger.debug("Heartbeat: agent running with enhancements")
+                
+                # Log distributed mesh status
+                if mesh:
+                    logger.debug(f"Mesh peers: {mesh[0]}, Role: {mesh[1]}")
+                
+                # Log LLM optimizer stats
+                if stats and stats['total_requests'] > 0:
                     logger.debug(f"LLM: {stats['total_requests']} requests, "
                                f"cache hit rate: {stats['cache_hit_rate']:.2%}")
+                
+                # Log federated learning status
+                if fed_stats:
+                    logger.debug(f"Federated: Round {fed_stats['round_number']}, "
+                               f"Clients: {fed_stats['registered_clients']}")
             
-            # Log federated learning status
-            if self.federated_coordinator:
-                fed_stats = self.federated_coordinator.get_statistics()
-                logger.debug(f"Federated: Round {fed_stats['round_number']}, "
-                           f"Clients: {fed_stats['registered_clients']}")
-            
-            await asyncio.sleep(30)
+            try:
+                await asyncio.wait_for(self.shutdown_event.wait(), timeout=self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                pass
 
 
 async def main():
@@ -10,12 +10,57 @@ import os
 import json
 import socket
 import struct
+import time
 from pathlib import Path
+from subprocess import Popen, DEVNULL
 from typing import Dict, Any, Optional, List
 
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+
 __version__ = "1.0.0"
 
+_LEN_HDR = struct.Struct('!I')
+# Below this size copying the payload behind the header is cheaper than
+# building an iovec for sendmsg
+_SENDMSG_MIN = 16 * 1024
+
+
+def _send_frame(sock: socket.socket, data: bytes):
+    """Write the length prefix and payload with a single send"""
+    header = _LEN_HDR.pack(len(data))
+    if len(data) < _SENDMSG_MIN:
+        sock.sendall(header + data)
+        return
+    sent = sock.sendmsg([header, data])
+    if sent < len(header) + len(data):
+        sock.sendall((header + data)[sent:])
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytearray:
+    """Read exactly n bytes; a bare recv(n) can return a short read"""
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        r = sock.recv_into(view[got:], n - got)
+        if not r:
+            raise ConnectionError("short read")
+        got += r
+    return buf
+
 
 class AgentConnection:
     """Connection to AI agent daemon"""
@@ -41,21 +86,13 @@ class AgentConnection:
         if not self._socket:
             self.connect()
         
-        data = json.dumps(message).encode()
-        self._socket.sendall(struct.pack('!I', len(data)))
-        self._socket.sendall(data)
+        data = _dumps(message)
+        _send_frame(self._socket, data)
         
-        length_data = self._socket.recv(4)
-        length = struct.unpack('!I', length_data)[0]
+        length = _LEN_HDR.unpack(_recv_exact(self._socket, 4))[0]
+        response_data = _recv_exact(self._socket, length)
         
-        response_data = b''
-        while len(response_data) < length:
-            chunk = self._socket.recv(min(4096, length - len(response_data)))
-            if not chunk:
-                break
-            response_data += chunk
-        
-        return json.loads(response_data.decode())
+        return _loads(response_data)
     
     def __enter__(self):
         self.connect()
@@ -94,15 +131,64 @@ def set_brightness(level: int) -> bool:
     return result.get('result', {}).get('success', False)
 
 
+# sysfs devices are rescanned at most this often; attribute files are kept
+# open and re-read with pread(), which makes sysfs regenerate the value
+_DISCOVER_TTL = 60.0
+_backlight_dev: Optional[Path] = None
+_backlight_ts = 0.0
+_battery_dev: Optional[Path] = None
+_battery_ts = 0.0
+_sysfs_fds: Dict[Path, int] = {}
+
+
+def _read_sysfs(path: Path) -> str:
+    """Read a sysfs attribute through a cached file descriptor"""
+    fd = _sysfs_fds.get(path)
+    if fd is None:
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        _sysfs_fds[path] = fd
+    try:
+        return os.pread(fd, 64, 0).decode().strip()
+    except OSError:
+        del _sysfs_fds[path]
+        os.close(fd)
+        raise
+
+
+def _forget_device(device: Optional[Path]):
+    """Close cached descriptors of a device that went away"""
+    if device is None:
+        return
+    for path in [p for p in _sysfs_fds if p.parent == device]:
+        os.close(_sysfs_fds.pop(path))
+
+
 def get_brightness() -> int:
     """Get current brightness"""
-    for device in Path("/sys/class/backlight").iterdir():
+    global _backlight_dev, _backlight_ts
+    
+    if _backlight_dev is not None and time.monotonic() - _backlight_ts < _DISCOVER_TTL:
         try:
-            current = int((device / "brightness").read_text().strip())
-            max_val = int((device / "max_brightness").read_text().strip())
+            current = int(_read_sysfs(_backlight_dev / "brightness"))
+            max_val = int(_read_sysfs(_backlight_dev / "max_brightness"))
             return int(current * 100 / max_val)
-        except:
+        except (OSError, ValueError, ZeroDivisionError):
             pass
+    
+    _forget_device(_backlight_dev)
+    _backlight_dev = None
+    try:
+        devices = list(Path("/sys/class/backlight").iterdir())
+    except OSError:
+        return -1
+    for device in devices:
+        try:
+            current = int(_read_sysfs(device / "brightness"))
+            max_val = int(_read_sysfs(device / "max_brightness"))
+            _backlight_dev, _backlight_ts = device, time.monotonic()
+            return int(current * 100 / max_val)
+        except (OSError, ValueError, ZeroDivisionError):
+            _forget_device(device)
     return -1
 
 
@@ -114,14 +200,29 @@ def set_volume(level: int) -> bool:
 
 def get_battery() -> Optional[Dict[str, Any]]:
     """Get battery status"""
-    for bat in Path("/sys/class/power_supply").glob("BAT*"):
+    global _battery_dev, _battery_ts
+    
+    if _battery_dev is not None and time.monotonic() - _battery_ts < _DISCOVER_TTL:
         try:
             return {
-                'level': int((bat / "capacity").read_text().strip()),
-                'status': (bat / "status").read_text().strip()
+                'level': int(_read_sysfs(_battery_dev / "capacity")),
+                'status': _read_sysfs(_battery_dev / "status")
             }
-        except:
+        except (OSError, ValueError):
             pass
+    
+    _forget_device(_battery_dev)
+    _battery_dev = None
+    for bat in Path("/sys/class/power_supply").glob("BAT*"):
+        try:
+            result = {
+                'level': int(_read_sysfs(bat / "capacity")),
+                'status': _read_sysfs(bat / "status")
+            }
+            _battery_dev, _battery_ts = bat, time.monotonic()
+            return result
+        except (OSError, ValueError):
+            _forget_device(bat)
     return None
 
 
@@ -132,24 +233,27 @@ def notify(summary: str, body: str = "", urgency: str = "normal") -> int:
         sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         sock.connect("/run/aios/notify.sock")
         
-        msg = json.dumps({
+        msg = _dumps({
             'cmd': 'notify',
             'summary': summary,
             'body': body,
             'urgency': urgency
-        }).encode()
+        })
         
-        sock.sendall(struct.pack('!I', len(msg)))
-        sock.sendall(msg)
+        _send_frame(sock, msg)
         
-        length = struct.unpack('!I', sock.recv(4))[0]
-        response = json.loads(sock.recv(length).decode())
+        length = _LEN_HDR.unpack(_recv_exact(sock, 4))[0]
+        response = _loads(_recv_exact(sock, length))
         sock.close()
         
         return response.get('id', 0)
     except:
-        # Fallback to notify-send
-        os.system(f'notify-send -u {urgency} "{summary}" "{body}"')
+        # Fallback to notify-send; fire and forget, no shell
+        try:
+            Popen(['notify-send', '-u', urgency, summary, body],
+                  stdout=DEVNULL, stderr=DEVNULL)
+        except OSError:
+            pass
         return 0
 
 
@@ -158,7 +262,7 @@ def get_config(name: str) -> Dict[str, Any]:
     """Load configuration file"""
     path = Path(f"/etc/aios/{name}.json")
     if path.exists():
-        return json.loads(path.read_text())
+        return _loads(path.read_bytes())
     return {}
 
 
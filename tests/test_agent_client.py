@@ -0,0 +1,79 @@
+import json
+import socket
+import struct
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "core" / "services"))
+from aios_common.agent_client import AgentClient  # noqa: E402
+
+
+def _recv_exact(conn, n):
+    data = b""
+    while len(data) < n:
+        chunk = conn.recv(n - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def _serve(path, handle):
+    """Accept connections forever, passing each one to handle(conn, requests)"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    requests = []
+
+    def loop():
+        while True:
+            conn, _ = server.accept()
+            try:
+                handle(conn, requests)
+            except EOFError:
+                pass
+            finally:
+                conn.close()
+
+    threading.Thread(target=loop, daemon=True).start()
+    return requests
+
+
+def _read_request(conn, requests):
+    length, = struct.unpack("!I", _recv_exact(conn, 4))
+    request = json.loads(_recv_exact(conn, length))
+    requests.append(request)
+    return request
+
+
+def _reply(conn, response):
+    data = json.dumps(response).encode()
+    conn.sendall(struct.pack("!I", len(data)) + data)
+
+
+def test_retries_when_idle_connection_was_dropped(tmp_path):
+    def handle(conn, requests):
+        # Answer one request, then drop the connection as an idle timeout would
+        request = _read_request(conn, requests)
+        _reply(conn, {"status": "ok", "echo": request["text"]})
+
+    requests = _serve(tmp_path / "agent.sock", handle)
+    client = AgentClient(str(tmp_path / "agent.sock"))
+    assert client.chat("one")["echo"] == "one"
+    assert client.chat("two")["echo"] == "two"
+    assert [r["text"] for r in requests] == ["one", "two"]
+
+
+def test_does_not_resend_after_partial_reply(tmp_path):
+    def handle(conn, requests):
+        _read_request(conn, requests)
+        # The request was handled but the reply is cut off mid-header
+        conn.sendall(b"\x00\x00")
+
+    requests = _serve(tmp_path / "agent.sock", handle)
+    client = AgentClient(str(tmp_path / "agent.sock"))
+    client._connect()
+    response = client.chat("run once")
+    assert response["status"] == "error"
+    assert [r["text"] for r in requests] == ["run once"]
@@ -0,0 +1,63 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "calculator", Path(__file__).resolve().parents[1] / "userland" / "apps" / "calculator.py"
+)
+calculator = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(calculator)
+safe_eval = calculator._safe_eval
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("1 + 2", 3),
+    ("7 - 10", -3),
+    ("6 * 7", 42),
+    ("7 / 2", 3.5),
+    ("7 // 2", 3),
+    ("7 % 3", 1),
+    ("2 ** 10", 1024),
+    ("-(3)", -3),
+    ("+4", 4),
+    ("(1 + 2) * 3", 9),
+    ("0.5 * 4", 2.0),
+])
+def test_safe_eval_allowed_operators(expr, expected):
+    assert safe_eval(expr) == expected
+
+
+@pytest.mark.parametrize("expr", [
+    "__import__('os')",
+    "abs(-1)",
+    "(1).real",
+    "x",
+    "'a' * 3",
+    "[1, 2]",
+    "1 if 1 else 2",
+    "1 < 2",
+    "1 << 2",
+    "True + 1",
+])
+def test_safe_eval_rejects_other_nodes(expr):
+    with pytest.raises(ValueError):
+        safe_eval(expr)
+
+
+def test_safe_eval_caps_exponent():
+    assert safe_eval("2 ** 1000") == 2 ** 1000
+    with pytest.raises(ValueError):
+        safe_eval("2 ** 1001")
+    with pytest.raises(ValueError):
+        safe_eval("2 ** -1001")
+
+
+def test_safe_eval_caps_nested_powers():
+    with pytest.raises(ValueError):
+        safe_eval("(9 ** 999) ** 999")
+    with pytest.raises(ValueError):
+        safe_eval("9 ** 999 ** 999")
+    with pytest.raises(ValueError):
+        safe_eval("(2 ** 1000) ** 11")
+    assert safe_eval("(2 ** 100) ** 10") == 2 ** 1000
@@ -0,0 +1,84 @@
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+NOTIFY_PATH = Path(__file__).resolve().parents[1] / "core" / "services" / "aios-notify" / "notify.py"
+
+
+def _load_notify(monkeypatch, hide_msgspec: bool):
+    if hide_msgspec:
+        # A None entry makes "import msgspec" raise ImportError
+        monkeypatch.setitem(sys.modules, "msgspec", None)
+    else:
+        pytest.importorskip("msgspec")
+    name = "aios_notify_nomsgspec" if hide_msgspec else "aios_notify"
+    spec = importlib.util.spec_from_file_location(name, NOTIFY_PATH)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, name, module)
+    spec.loader.exec_module(module)
+    assert module.HAS_MSGSPEC is not hide_msgspec
+    return module
+
+
+@pytest.fixture(params=[False, True], ids=["msgspec", "no-msgspec"])
+def notify(request, monkeypatch, tmp_path):
+    module = _load_notify(monkeypatch, hide_msgspec=request.param)
+    monkeypatch.setattr(module.NotificationDaemon, "HISTORY_PATH", str(tmp_path / "history.jsonl"))
+    monkeypatch.setattr(module.NotificationDaemon, "NEXT_ID_PATH", str(tmp_path / "nextid"))
+    monkeypatch.setattr(module.NotificationDaemon, "_display_notification", lambda self, n: None)
+    return module
+
+
+def test_notify_with_argv_action_decodes_and_invokes(notify, monkeypatch):
+    request = notify._parse_request(
+        b'{"cmd":"notify","summary":"s","actions":'
+        b'[{"key":"k","label":"L","argv":["xdg-open","x"]}]}'
+    )
+    assert request.actions == [{"key": "k", "label": "L", "argv": ["xdg-open", "x"]}]
+
+    launched = []
+
+    async def fake_exec(*argv, **kwargs):
+        launched.append(argv)
+
+    monkeypatch.setattr(notify.asyncio, "create_subprocess_exec", fake_exec)
+    daemon = notify.NotificationDaemon()
+
+    async def run():
+        response = await daemon._process_request(request)
+        assert response["status"] == "ok"
+        return await daemon.invoke_action(response["id"], "k")
+
+    assert asyncio.run(run()) is True
+    assert launched == [("xdg-open", "x")]
+
+
+def test_field_less_requests_are_handled(notify):
+    daemon = notify.NotificationDaemon()
+    for data in (b'{"cmd":"mark_all_read"}', b'{"cmd":"clear"}'):
+        response = asyncio.run(daemon._process_request(notify._parse_request(data)))
+        assert response["status"] == "ok"
+
+
+@pytest.mark.parametrize("data", [
+    b'{"cmd":"notify","bogus":1}',
+    b'{"cmd":"notify","timeout":"soon"}',
+    b'{"cmd":"notify","timeout":true}',
+    b'{"cmd":"clear","id":3}',
+    b'{"cmd":"nope"}',
+])
+def test_bad_requests_raise_request_errors(notify, data):
+    with pytest.raises(notify._REQUEST_ERRORS):
+        notify._parse_request(data)
+
+
+def test_unknown_urgency_gets_error_reply(notify):
+    daemon = notify.NotificationDaemon()
+    request = notify._parse_request(b'{"cmd":"notify","summary":"s","urgency":"bogus"}')
+    response = asyncio.run(daemon._process_request(request))
+    assert response["status"] == "error"
+    request = notify._parse_request(b'{"cmd":"notify","summary":"s","urgency":"normal"}')
+    assert asyncio.run(daemon._process_request(request))["status"] == "ok"
@@ -2,6 +2,7 @@
 Adaptive UI shell for AI-OS.
 """
 import logging
+import sys
 from pathlib import Path
 from agent.agent import CommandRegistry, parse_command
 from agent.system_api import SystemAPI
@@ -17,11 +18,21 @@ def launch_shell(allowed_root: Path | None = None) -> None:
     api = SystemAPI(allowed_root=allowed_root)
     registry = CommandRegistry(api)
     logger.info("UI Shell launched")
-    print("[AI-OS Shell] Adaptive shell starting (type 'help' for commands)")
-    while True:
-        raw = get_text_input("[ai-os] ")
-        cmd, args = parse_command(raw)
-        if not registry.execute(cmd, args):
-            break
-    logger.info("UI Shell exiting")
-    print("[AI-OS Shell] Goodbye.")
+    # Block-buffer stdout while the shell runs; input() flushes it before
+    # each prompt, so output still appears before the user types
+    line_buffered = getattr(sys.stdout, "line_buffering", False)
+    if line_buffered:
+        sys.stdout.reconfigure(line_buffering=False)
+    try:
+        print("[AI-OS Shell] Adaptive shell starting (type 'help' for commands)")
+        while True:
+            raw = get_text_input("[ai-os] ")
+            cmd, args = parse_command(raw)
+            if not registry.execute(cmd, args):
+                break
+        logger.info("UI Shell exiting")
+        print("[AI-OS Shell] Goodbye.")
+    finally:
+        sys.stdout.flush()
+        if line_buffered:
+            sys.stdout.reconfigure(line_buffering=True)
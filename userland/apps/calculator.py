@@ -4,24 +4,81 @@ AI-OS Calculator
 Simple calculator application.
 """
 
+import ast
+import operator
 import sys
+from functools import lru_cache
 
 try:
     import gi
     gi.require_version('Gtk', '4.0')
-    from gi.repository import Gtk
+    from gi.repository import Gio, GLib, Gtk
     HAS_GTK = True
 except ImportError:
     HAS_GTK = False
 
 
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+_MAX_EXPONENT = 1000
+# Integer powers are refused once the result would need more bits than this,
+# so nested powers such as (9**999)**999 can't stall the app
+_MAX_POW_BITS = 10_000
+
+
+@lru_cache(maxsize=256)
+def _parse(expr: str) -> ast.expr:
+    return ast.parse(expr, mode='eval').body
+
+
+def _eval_node(node: ast.expr):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        left = _eval_node(node.left)
+        right = _eval_node(node.right)
+        if isinstance(node.op, ast.Pow):
+            if abs(right) > _MAX_EXPONENT:
+                raise ValueError("Exponent too large")
+            if (isinstance(left, int) and isinstance(right, int) and right > 0
+                    and abs(left).bit_length() * right > _MAX_POW_BITS):
+                raise ValueError("Result too large")
+        return _BIN_OPS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval_node(node.operand))
+    raise ValueError("Unsupported expression")
+
+
+def _safe_eval(expr: str):
+    """Evaluate an arithmetic expression without going through eval()"""
+    return _eval_node(_parse(expr))
+
+
 if HAS_GTK:
     class Calculator(Gtk.Application):
         def __init__(self):
             super().__init__(application_id='com.aios.calculator')
-            self.expression = ""
+            self._tokens: list[str] = []
+            self.window = None
         
         def do_activate(self):
+            # Re-activation (e.g. launching again from the dock) just raises
+            # the existing window
+            if self.window is not None:
+                self.window.present()
+                return
+            
             window = Gtk.ApplicationWindow(application=self, title="Calculator")
             window.set_default_size(300, 400)
             
@@ -48,41 +105,56 @@ if HAS_GTK:
                 ['0', '.', '±', '='],
             ]
             
+            # All buttons activate one app.key action with their label as
+            # the target, instead of each carrying its own handler
+            action = Gio.SimpleAction.new('key', GLib.VariantType.new('s'))
+            action.connect('activate', self._on_key)
+            self.add_action(action)
+            
             for row in buttons:
                 row_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
                 row_box.set_homogeneous(True)
                 
                 for label in row:
                     btn = Gtk.Button(label=label)
-                    btn.connect('clicked', self.on_button_click, label)
+                    btn.set_action_name('app.key')
+                    btn.set_action_target_value(GLib.Variant.new_string(label))
                     row_box.append(btn)
                 
                 main_box.append(row_box)
             
             window.set_child(main_box)
             window.present()
+            
+            self.window = window
         
-        def on_button_click(self, button, label):
+        def _on_key(self, action, param):
+            label = param.get_string()
+            tokens = self._tokens
             if label == 'C':
-                self.expression = ""
+                tokens.clear()
                 self.display.set_text("0")
             elif label == '=':
                 try:
-                    result = eval(self.expression)
-                    self.display.set_text(str(result))
-                    self.expression = str(result)
+                    result = str(_safe_eval("".join(tokens)))
+                    self.display.set_text(result)
+                    self._tokens = [result]
                 except:
                     self.display.set_text("Error")
-                    self.expression = ""
+                    tokens.clear()
             elif label == '±':
-                if self.expression.startswith('-'):
-                    self.expression = self.expression[1:]
+                if tokens and tokens[0].startswith('-'):
+                    # Either a lone sign token or a negative result
+                    if tokens[0] == '-':
+                        del tokens[0]
+                    else:
+                        tokens[0] = tokens[0][1:]
                 else:
-                    self.expression = '-' + self.expression
-                self.display.set_text(self.expression or "0")
+                    tokens.insert(0, '-')
+                self.display.set_text("".join(tokens) or "0")
             else:
-                self.expression += label
-                self.display.set_text(self.expression)
+                tokens.append(label)
+                self.display.set_text("".join(tokens))
 
 
 def main():
@@ -98,7 +170,7 @@ def main():
                 expr = input(">>> ")
                 if expr.lower() in ('exit', 'quit'):
                     break
-                print(eval(expr))
+                print(_safe_eval(expr))
             except (KeyboardInterrupt, EOFError):
                 break
             except Exception as e:
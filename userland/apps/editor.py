@@ -11,7 +11,7 @@ try:
     import gi
     gi.require_version('Gtk', '4.0')
     gi.require_version('GtkSource', '5')
-    from gi.repository import Gtk, Gio
+    from gi.repository import Gtk, Gio, GLib
     HAS_GTK = True
 except ImportError:
     HAS_GTK = False
@@ -22,8 +22,15 @@ if HAS_GTK:
         def __init__(self):
             super().__init__(application_id='com.aios.editor')
             self.current_file = None
+            self.window = None
         
         def do_activate(self):
+            # Re-activation (e.g. launching again from the dock) just raises
+            # the existing window
+            if self.window is not None:
+                self.window.present()
+                return
+            
             window = Gtk.ApplicationWindow(application=self, title="Text Editor")
             window.set_default_size(800, 600)
             
@@ -91,13 +98,22 @@ if HAS_GTK:
             try:
                 file = dialog.open_finish(result)
                 if file:
-                    path = file.get_path()
-                    with open(path, 'r') as f:
-                        content = f.read()
-                    self.text_view.get_buffer().set_text(content)
-                    self.current_file = path
-                    self.window.set_title(f"Text Editor - {os.path.basename(path)}")
-                    self.status.set_text(f"Opened: {path}")
+                    # Read off the main loop so large files don't freeze the UI
+                    self.status.set_text(f"Opening: {file.get_path()}")
+                    file.load_contents_async(None, self._on_contents_loaded)
+            except Exception as e:
+                self.status.set_text(f"Error: {e}")
+        
+        def _on_contents_loaded(self, file, result):
+            try:
+                _, contents, _ = file.load_contents_finish(result)
+                path = file.get_path()
+                self.text_view.get_buffer().set_text(
+                    contents.decode('utf-8', errors='replace'), -1
+                )
+                self.current_file = path
+                self.window.set_title(f"Text Editor - {os.path.basename(path)}")
+                self.status.set_text(f"Opened: {path}")
             except Exception as e:
                 self.status.set_text(f"Error: {e}")
         
@@ -123,9 +139,19 @@ if HAS_GTK:
                 end = buffer.get_end_iter()
                 content = buffer.get_text(start, end, True)
                 
-                with open(path, 'w') as f:
-                    f.write(content)
-                
+                self.status.set_text(f"Saving: {path}")
+                Gio.File.new_for_path(path).replace_contents_bytes_async(
+                    GLib.Bytes.new(content.encode('utf-8')),
+                    None, False, Gio.FileCreateFlags.NONE, None,
+                    self._on_contents_saved
+                )
+            except Exception as e:
+                self.status.set_text(f"Error: {e}")
+        
+        def _on_contents_saved(self, file, result):
+            try:
+                file.replace_contents_finish(result)
+                path = file.get_path()
                 self.current_file = path
                 self.window.set_title(f"Text Editor - {os.path.basename(path)}")
                 self.status.set_text(f"Saved: {path}")